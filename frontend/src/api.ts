@@ -1,5 +1,5 @@
 import axios from 'axios'
-import type { Route, ForecastReport, GribFile, HealthResponse } from './types'
+import type { Route, ForecastReport, GribFile, HealthResponse, TileMeta } from './types'
 
 const api = axios.create({
   baseURL: '/',
@@ -30,4 +30,13 @@ export const apiService = {
     const response = await api.get<GribFile[]>('/api/grib-files')
     return response.data
   },
+
+  async getTileMeta(model: string = 'gfs'): Promise<TileMeta> {
+    const response = await api.get<TileMeta>(`/api/tiles/${model}/latest`)
+    return response.data
+  },
+
+  tileUrl(meta: TileMeta, fhour: number): string {
+    return `/api/tiles/${meta.model}/${meta.version}/${String(fhour).padStart(3, '0')}.png`
+  },
 }
@@ -34,6 +34,27 @@ export interface GribFile {
   forecast_hour?: number
 }
 
+export interface TileChannel {
+  variable: string
+  offset: number
+  scale: number
+  units: string
+  present: boolean
+}
+
+// value = offset + (byte - 1) * scale; byte 0 means no data
+export interface TileMeta {
+  model: string
+  cycle: string
+  version: string
+  bbox: [number, number, number, number]
+  width: number
+  height: number
+  fhours: number[]
+  valid_times?: string[]
+  channels: Record<'r' | 'g' | 'b', TileChannel>
+}
+
 export interface HealthResponse {
   status: string
 }
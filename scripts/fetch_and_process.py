@@ -2,25 +2,68 @@
 from __future__ import annotations
 
 import argparse
+import os
+import time
 from datetime import datetime
 
+from wx_engine.batch import load_manifest, run_batch, summarize_jobs, write_outputs
 from wx_engine.config import load_config
 from wx_engine.manager import ForecastManager
 
 
+def run_manifest(cfg, manager: ForecastManager, args) -> None:
+    """Load each model cycle once, then extract every manifest job in parallel."""
+    start = time.perf_counter()
+    jobs = load_manifest(args.batch, cfg.default_route, cfg.vessel_speed, [r.id for r in manager.routes.list()])
+    routes = {route_id: manager.routes.get(route_id) for route_id in {job.route_id for job in jobs}}
+    cycles = manager.load_cycles(sorted(routes))
+    loaded = time.perf_counter()
+
+    workers = args.workers or os.cpu_count() or 1
+    versions = {model: ds.attrs["version"] for model, ds in cycles.items()}
+    points = run_batch(cfg.store_dir, versions, [(job, routes[job.route_id]) for job in jobs], workers)
+    job_table = summarize_jobs(jobs, points)
+    done = time.perf_counter()
+
+    out_dir = args.out or os.path.join(cfg.data_dir, "batch", datetime.utcnow().strftime("%Y%m%d%H%M%S"))
+    summary = {
+        "manifest": args.batch,
+        "jobs": len(jobs),
+        "points": len(points),
+        "workers": workers,
+        "models": {
+            model: {"cycle": ds.attrs.get("cycle"), "version": ds.attrs["version"]} for model, ds in cycles.items()
+        },
+        "load_seconds": round(loaded - start, 3),
+        "extract_seconds": round(done - loaded, 3),
+    }
+    paths = write_outputs(out_dir, job_table, points, summary)
+    print(f"Batch of {len(jobs)} jobs ({len(points)} points) written to {paths['points']}")
+
+
 def main():
     parser = argparse.ArgumentParser(description="Fetch GRIB data and generate forecast")
     parser.add_argument("--route", default=None, help="Route ID")
     parser.add_argument("--departure", required=False, help="Departure ISO time (UTC)")
     parser.add_argument("--speed", type=float, default=None, help="Speed over ground in knots")
+    parser.add_argument("--batch", default=None, help="CSV/JSON manifest of route,departure,speed jobs")
+    parser.add_argument("--workers", type=int, default=None, help="Batch worker processes (default: CPU count)")
+    parser.add_argument("--out", default=None, help="Batch output directory (default: data/batch/<timestamp>)")
     args = parser.parse_args()
 
     cfg = load_config()
+    manager = ForecastManager(cfg)
+    if args.batch:
+        try:
+            run_manifest(cfg, manager, args)
+        except ValueError as exc:
+            parser.error(str(exc))
+        return
+
     route = args.route or cfg.default_route
     departure = datetime.fromisoformat(args.departure) if args.departure else datetime.utcnow()
     speed = args.speed or cfg.vessel_speed
 
-    manager = ForecastManager(cfg)
     manager.run(route, departure, speed)
     print("Forecast generated for", route)
 
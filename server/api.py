@@ -3,24 +3,50 @@ from __future__ import annotations
 import json
 import os
 import re
+import time
 from datetime import datetime
 from pathlib import Path
 from typing import Optional
 
+import numpy as np
+import pandas as pd
 from fastapi import Depends, FastAPI, HTTPException, Request
-from fastapi.responses import FileResponse, HTMLResponse, JSONResponse
+from fastapi.responses import FileResponse, HTMLResponse, JSONResponse, PlainTextResponse, Response
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from fastapi.staticfiles import StaticFiles
 
 from wx_engine.config import load_config
-from wx_engine.manager import ForecastManager
-from wx_engine.routes import get_route, list_routes
+from wx_engine.interp.derived import derive
+from wx_engine.interp.interpolator import sample_arrays
+from wx_engine.manager import CONSENSUS, ForecastManager
+from wx_engine.metrics import CONTENT_TYPE, HTTP_SECONDS, inflight, render_latest
+from wx_engine.routes import route_from_dict, route_to_dict
 
 app = FastAPI(title="Marine Weather Routing API")
 security = HTTPBearer(auto_error=False)
 config = load_config()
 manager = ForecastManager(config)
 
+MAX_POINTS = 50_000
+POINT_MODELS = ("gfs", "ecmwf", CONSENSUS)
+TILE_NAME = re.compile(r"\d{3}\.png|meta\.json")
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Label by route template, not raw path, to keep cardinality bounded
+        route = request.scope.get("route")
+        path = getattr(route, "path", "unmatched")
+        HTTP_SECONDS.observe(time.perf_counter() - start, method=request.method, path=path, status=str(status))
+
 
 def auth(credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)):
     if not credentials:
@@ -39,7 +65,11 @@ def api_root():
             "routes": "/routes",
             "forecast": "/forecast",
             "latest_report": "/latest-report/{route_id}",
+            "trace": "/trace/{route_id}",
+            "points": "/points",
+            "tiles": "/api/tiles/{model}/latest",
             "web_view": "/web/{route_id}",
+            "metrics": "/metrics",
         },
         "note": base_path_hint,
     }
@@ -50,9 +80,59 @@ def health():
     return {"status": "ok"}
 
 
+@app.get("/metrics")
+def metrics():
+    return PlainTextResponse(render_latest(), media_type=CONTENT_TYPE)
+
+
 @app.get("/routes")
-def routes():
-    return [r.__dict__ for r in list_routes()]
+def routes(bbox: Optional[str] = None):
+    """All routes, or with ``bbox=west,east,south,north`` only those whose padded box intersects it."""
+    if bbox is None:
+        return [route_to_dict(r) for r in manager.routes.list()]
+    try:
+        west, east, south, north = (float(v) for v in bbox.split(","))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="bbox must be west,east,south,north")
+    return [route_to_dict(r) for r in manager.routes.query((west, east, south, north))]
+
+
+@app.get("/routes/{route_id}")
+def get_route(route_id: str):
+    try:
+        route = manager.routes.get(route_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Route not found")
+    return {**route_to_dict(route), "bbox": route.bbox(config.route_bbox_pad)}
+
+
+@app.post("/routes", status_code=201)
+def create_route(body: dict, _: None = Depends(auth)):
+    try:
+        route = route_from_dict(body)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    try:
+        return route_to_dict(manager.routes.create(route))
+    except ValueError:
+        raise HTTPException(status_code=409, detail="Route already exists")
+
+
+@app.put("/routes/{route_id}")
+def update_route(route_id: str, body: dict, _: None = Depends(auth)):
+    try:
+        route = route_from_dict({**body, "id": route_id})
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return route_to_dict(manager.routes.upsert(route))
+
+
+@app.delete("/routes/{route_id}", status_code=204)
+def delete_route(route_id: str, _: None = Depends(auth)):
+    try:
+        manager.routes.delete(route_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Route not found")
 
 
 @app.post("/forecast")
@@ -66,13 +146,82 @@ def forecast(request: Request, body: dict, _: None = Depends(auth)):
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid departure_time")
     speed = float(body.get("speed_knots", config.vessel_speed))
+    profile = bool(body["profile"]) if "profile" in body else None
     try:
-        result = manager.run(route_id, departure, speed)
+        with inflight("api"):
+            result = manager.run(route_id, departure, speed, profile=profile)
     except KeyError:
         raise HTTPException(status_code=404, detail="Route not found")
     return result
 
 
+def _column(values: np.ndarray) -> list:
+    """JSON-ready list with NaN as null; floats rounded to keep the payload compact."""
+    if values.dtype.kind == "f":
+        values = np.round(values.astype(np.float64), 3)
+        return [None if v != v else v for v in values.tolist()]
+    if values.dtype.kind == "M":
+        return np.datetime_as_string(values.astype("datetime64[s]"), unit="s").tolist()
+    return values.tolist()
+
+
+@app.post("/points")
+def points(body: dict):
+    """Batch point lookup against the cached decoded cycles.
+
+    Body is columnar: ``{"lat": [...], "lon": [...], "time": [...]}`` with
+    ISO strings or epoch seconds (UTC), plus optional ``models`` and
+    ``variables``. Each model is answered with one vectorised nearest-cell
+    lookup on the memory-mapped store; nothing is downloaded or decoded.
+    """
+    try:
+        lats = np.asarray(body["lat"], dtype=float)
+        lons = np.asarray(body["lon"], dtype=float)
+        raw_times = body["time"]
+    except (KeyError, TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="lat, lon and time arrays required")
+    if not isinstance(raw_times, list):
+        raise HTTPException(status_code=400, detail="lat, lon and time arrays required")
+    if not (lats.ndim == lons.ndim == 1 and len(lats) == len(lons) == len(raw_times)):
+        raise HTTPException(status_code=400, detail="lat, lon and time must be equal-length arrays")
+    if len(lats) > MAX_POINTS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_POINTS} points per request")
+    try:
+        unit = "s" if raw_times and isinstance(raw_times[0], (int, float)) else None
+        stamps = pd.to_datetime(raw_times, utc=True, unit=unit)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid time")
+    if stamps.isna().any():
+        raise HTTPException(status_code=400, detail=f"Invalid time at index {int(np.argmax(stamps.isna()))}")
+    times = stamps.tz_localize(None).values.astype("datetime64[s]")
+    requested = body.get("models") or [m for m in POINT_MODELS if m == CONSENSUS or getattr(config, m).enabled]
+    if not isinstance(requested, list) or any(m not in POINT_MODELS for m in requested):
+        raise HTTPException(status_code=400, detail=f"models must be a subset of {list(POINT_MODELS)}")
+    variables = body.get("variables")
+    if variables is not None and (not isinstance(variables, list) or not all(isinstance(v, str) for v in variables)):
+        raise HTTPException(status_code=400, detail="variables must be a list of names")
+
+    result = {}
+    for model in requested:
+        ds = manager.store.open(model)
+        if ds is None:
+            continue
+        sampled = sample_arrays(ds, lats, lons, times, mask_outside=True)
+        if variables:
+            sampled = derive(sampled, variables)
+            names = [v for v in variables if v in sampled]
+        else:
+            names = list(sampled.data_vars)
+        columns = {"cycle": ds.attrs.get("cycle"), "fhour": _column(sampled["fhour"].values)}
+        if "valid_time" in sampled.coords:
+            columns["valid_time"] = _column(sampled["valid_time"].values)
+        for name in names:
+            columns[name] = _column(np.asarray(sampled[name].values))
+        result[model] = columns
+    # Already JSON-native; skip FastAPI's per-element encoder on large batches
+    return JSONResponse({"count": len(lats), "models": result})
+
+
 @app.get("/latest-report/{route_id}")
 def latest_report(route_id: str, model: str = "gfs", fmt: str = "json", _: None = Depends(auth)):
     folder = Path(config.forecast_dir) / route_id
@@ -84,6 +233,18 @@ def latest_report(route_id: str, model: str = "gfs", fmt: str = "json", _: None
     return JSONResponse(json.loads(path.read_text()))
 
 
+@app.get("/trace/{route_id}")
+def run_trace(route_id: str, run_id: str = "latest", _: None = Depends(auth)):
+    """Span tree of a forecast run; ``run_id`` comes from the forecast payload."""
+    if not re.fullmatch(r"[\w-]+", run_id):
+        raise HTTPException(status_code=400, detail="Invalid run_id")
+    folder = Path(config.forecast_dir) / route_id
+    path = folder / ("latest_trace.json" if run_id == "latest" else f"trace_{run_id}.json")
+    if not path.exists():
+        raise HTTPException(status_code=404, detail="No trace available")
+    return JSONResponse(json.loads(path.read_text()))
+
+
 @app.get("/web/{route_id}", response_class=HTMLResponse)
 async def web_view(route_id: str, model: str = "gfs"):
     folder = Path(config.forecast_dir) / route_id
@@ -148,6 +309,36 @@ def grib_files():
     return files
 
 
+def _cached_file(request: Request, path: Path, media_type: str, cache_control: str) -> Response:
+    """Serve ``path`` with an ETag, answering a matching ``If-None-Match`` with 304."""
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Not found")
+    etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type=media_type, headers=headers)
+
+
+@app.get("/api/tiles/{model}/latest")
+def tiles_latest(request: Request, model: str):
+    """Tile metadata for the newest cycle; clients revalidate it, then fetch immutable tiles."""
+    if not re.fullmatch(r"[\w-]+", model):
+        raise HTTPException(status_code=400, detail="Invalid model")
+    return _cached_file(request, Path(config.tiles_dir) / model / "latest.json", "application/json", "no-cache")
+
+
+@app.get("/api/tiles/{model}/{version}/{name}")
+def tile(request: Request, model: str, version: str, name: str):
+    """A tile PNG (``{fhour:03d}.png``) or its ``meta.json``; content never changes for a URL."""
+    if not (re.fullmatch(r"[\w-]+", model) and re.fullmatch(r"[\w-]+", version) and TILE_NAME.fullmatch(name)):
+        raise HTTPException(status_code=400, detail="Invalid tile path")
+    media_type = "image/png" if name.endswith(".png") else "application/json"
+    return _cached_file(request, Path(config.tiles_dir) / model / version / name, media_type, IMMUTABLE)
+
+
 # Mount static assets first
 if Path("frontend/dist/assets").exists():
     app.mount("/assets", StaticFiles(directory="frontend/dist/assets"), name="assets")
@@ -7,6 +7,7 @@ from apscheduler.schedulers.background import BackgroundScheduler
 
 from wx_engine.config import load_config
 from wx_engine.manager import ForecastManager
+from wx_engine.metrics import inflight
 
 logger = logging.getLogger(__name__)
 config = load_config()
@@ -16,7 +17,8 @@ manager = ForecastManager(config)
 def run_job():
     try:
         departure = datetime.now(tz=timezone.utc)
-        manager.run(config.default_route, departure, config.vessel_speed)
+        with inflight("scheduler"):
+            manager.run(config.default_route, departure, config.vessel_speed)
         logger.info("Scheduled forecast complete")
     except Exception as exc:
         logger.exception("Scheduled forecast failed: %s", exc)
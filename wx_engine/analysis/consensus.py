@@ -0,0 +1,121 @@
+"""Multi-model comparison on a common grid: consensus, spread and disagreement."""
+from __future__ import annotations
+
+import warnings
+from functools import reduce
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+import xarray as xr
+
+from wx_engine.interp.derived import derive
+from wx_engine.interp.interpolator import sample_points
+from wx_engine.interp.regrid import Grid, RegridCache
+
+CONSENSUS_VARIABLES = ("wind_speed_kt", "gust", "swh", "mslp")
+
+# (variable, disagreement threshold, label, units) for the comparison notes
+DISAGREEMENT = [
+    ("wind_speed_kt", 10.0, "Wind speed", "kt"),
+    ("swh", 1.5, "Wave height", "m"),
+]
+
+
+def common_grid(datasets: Dict[str, xr.Dataset], bbox: Sequence[float]) -> Grid:
+    """Regular grid at the coarsest model resolution over the part of ``bbox`` every model covers."""
+    grids = [Grid.from_dataset(ds) for ds in datasets.values()]
+    resolution = max(g.resolution for g in grids) or 0.25
+    west, east, south, north = bbox
+    for grid in grids:
+        lons = np.where(grid.lons > 180, grid.lons - 360, grid.lons)
+        west, east = max(west, lons.min()), min(east, lons.max())
+        south, north = max(south, grid.lats.min()), min(north, grid.lats.max())
+    return Grid.regular((west, east, south, north), resolution)
+
+
+def _align(datasets: Dict[str, xr.Dataset]) -> Tuple[np.ndarray, Dict[str, np.ndarray], bool]:
+    """Times every model shares (valid times when decoded, else forecast hours) and each model's fhour indices."""
+    use_valid = all("valid_time" in ds.coords and ds["valid_time"].dims == ("fhour",) for ds in datasets.values())
+    keys = {
+        model: ds["valid_time"].values.astype("datetime64[s]") if use_valid else ds["fhour"].values
+        for model, ds in datasets.items()
+    }
+    shared = reduce(np.intersect1d, keys.values())
+    indices = {}
+    for model, values in keys.items():
+        position = {v: i for i, v in enumerate(values.tolist())}
+        indices[model] = np.array([position[v] for v in shared.tolist()], dtype=int)
+    return shared, indices, use_valid
+
+
+def build_consensus(
+    datasets: Dict[str, xr.Dataset],
+    bbox: Sequence[float],
+    cache: RegridCache,
+    variables: Sequence[str] = CONSENSUS_VARIABLES,
+) -> xr.Dataset:
+    """Regrid every model once onto a common grid and reduce across models.
+
+    For each variable the result holds ``<var>_mean`` (consensus),
+    ``<var>_spread`` (std across models) and ``<var>_range`` (max - min, i.e.
+    the largest pairwise difference) on ``(fhour, latitude, longitude)``.
+    Cost grows linearly with the number of models. Models sharing no valid
+    time (e.g. one is a stale cycle) give an empty dataset.
+    """
+    models = sorted(datasets)
+    shared, indices, use_valid = _align(datasets)
+    if len(shared) == 0:
+        return xr.Dataset(attrs={"models": ",".join(models)})
+    target = common_grid(datasets, bbox)
+    dims = ("fhour", "latitude", "longitude")
+    out: Dict[str, tuple] = {}
+    for var in variables:
+        stacked = []
+        for model in models:
+            ds = datasets[model]
+            # Full-grid derivation only for the fields this gridded product needs
+            field = derive(ds.isel(fhour=indices[model]), [var])
+            if var not in field:
+                break
+            lat_name = "latitude" if "latitude" in field.coords else "lat"
+            lon_name = "longitude" if "longitude" in field.coords else "lon"
+            weights = cache.get(Grid.from_dataset(ds), target)
+            stacked.append(weights.apply(field[var].transpose("fhour", lat_name, lon_name).values))
+        else:
+            cube = np.stack(stacked)  # (model, fhour, lat, lon)
+            with warnings.catch_warnings():
+                # cells with no valid model value (e.g. waves over land) stay NaN
+                warnings.simplefilter("ignore", RuntimeWarning)
+                out[f"{var}_mean"] = (dims, np.nanmean(cube, axis=0))
+                out[f"{var}_spread"] = (dims, np.nanstd(cube, axis=0))
+                out[f"{var}_range"] = (dims, np.nanmax(cube, axis=0) - np.nanmin(cube, axis=0))
+    ref = models[0]
+    coords = {
+        "fhour": datasets[ref]["fhour"].values[indices[ref]],
+        "latitude": target.lats,
+        "longitude": target.lons,
+    }
+    if use_valid:
+        coords["valid_time"] = ("fhour", shared)
+    return xr.Dataset(out, coords=coords, attrs={"models": ",".join(models)})
+
+
+def consensus_notes(consensus: xr.Dataset, track: List[dict]) -> List[str]:
+    """Comparison notes from the consensus fields sampled along the track."""
+    notes: List[str] = []
+    if not track or consensus.sizes.get("fhour", 0) == 0:
+        return notes
+    sampled = sample_points(consensus, track)
+    for var, threshold, label, units in DISAGREEMENT:
+        if f"{var}_range" not in sampled:
+            continue
+        spread = sampled[f"{var}_range"].values
+        if np.all(np.isnan(spread)):
+            continue
+        worst = float(np.nanmax(spread))
+        if worst > threshold:
+            notes.append(f"{label} disagreement >{threshold:g} {units} (max diff {worst:.1f})")
+    return notes
+
+
+__all__ = ["CONSENSUS_VARIABLES", "build_consensus", "common_grid", "consensus_notes"]
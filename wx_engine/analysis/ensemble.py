@@ -0,0 +1,99 @@
+"""Probabilistic summaries over ensemble members."""
+from __future__ import annotations
+
+from typing import Dict, List, Optional
+
+import numpy as np
+import xarray as xr
+
+from wx_engine.interp.derived import derive
+
+# (column, variable, threshold in the variable's units)
+EXCEEDANCE = [
+    ("p_wind_25kt", "wind_speed_kt", 25.0),
+    ("p_gust_34kt", "gust_kt", 34.0),
+    ("p_swh_2_5m", "swh", 2.5),
+]
+BANDS = [
+    ("wind_kt", "wind_speed_kt"),
+    ("gust_kt", "gust_kt"),
+    ("swh_m", "swh"),
+]
+PERCENTILES = (10, 50, 90)
+# Reported as the member median (circular mean for directions); kt columns sit beside the kt bands
+CENTRE_VARIABLES = ["wind_speed", "wind_speed_kt", "wind_dir", "gust", "gust_kt", "mslp", "prate", "swh", "dwp", "mwd", "cape"]
+CIRCULAR = {"wind_dir", "mwd"}
+
+
+def _circular_mean(degrees: np.ndarray, axis: int = 0) -> np.ndarray:
+    rad = np.deg2rad(degrees)
+    return np.rad2deg(np.arctan2(np.nanmean(np.sin(rad), axis=axis), np.nanmean(np.cos(rad), axis=axis))) % 360
+
+
+def member_fields(sampled: xr.Dataset) -> xr.Dataset:
+    """Add the derived fields the summaries need to a ``(member, point)`` sample."""
+    return derive(sampled, ["wind_speed", "wind_dir", "wind_speed_kt", "gust_kt"])
+
+
+def ensemble_series(sampled: xr.Dataset, points: List[dict]) -> List[dict]:
+    """Collapse the member dimension into per-point medians, percentile bands and exceedance probabilities.
+
+    Everything is computed with array reductions over ``member``; the median
+    (circular mean for directions) keeps the deterministic column names so
+    the usual summary, hazard and risk logic applies to the ensemble centre.
+    """
+    sampled = member_fields(sampled).transpose("member", "point", ...)
+    columns: Dict[str, np.ndarray] = {}
+    for var in CENTRE_VARIABLES:
+        if var in CIRCULAR and var in sampled:
+            columns[var] = _circular_mean(sampled[var].values, axis=0)
+        elif var in sampled:
+            columns[var] = np.nanmedian(sampled[var].values, axis=0)
+    for name, var in BANDS:
+        if var not in sampled:
+            continue
+        bands = np.nanpercentile(sampled[var].values, PERCENTILES, axis=0)
+        for pct, band in zip(PERCENTILES, bands):
+            columns[f"{name}_p{pct}"] = band
+    for name, var, threshold in EXCEEDANCE:
+        if var in sampled:
+            columns[name] = np.mean(sampled[var].values > threshold, axis=0)
+    fhours = sampled["fhour"].values
+    rows: List[dict] = []
+    for i, pt in enumerate(points):
+        row = {
+            "time_utc": pt["time_utc"],
+            "lat": pt["lat"],
+            "lon": pt["lon"],
+            "source_fhour": int(fhours[i]),
+        }
+        for name, values in columns.items():
+            row[name] = float(values[i])
+        rows.append(row)
+    return rows
+
+
+def ensemble_outlook(series: List[dict], members: int) -> Optional[dict]:
+    """Headline probabilities for the briefing: peak exceedance and when it occurs."""
+    if not series:
+        return None
+    outlook: dict = {"members": members, "exceedance": {}}
+    for name, _, threshold in EXCEEDANCE:
+        if name not in series[0]:
+            continue
+        values = [row[name] for row in series]
+        peak = int(np.argmax(values))
+        outlook["exceedance"][name] = {
+            "threshold": threshold,
+            "max_probability": float(values[peak]),
+            "time_utc": series[peak]["time_utc"],
+        }
+    for name, _ in BANDS:
+        if f"{name}_p50" not in series[0]:
+            continue
+        peak = int(np.argmax([row[f"{name}_p50"] for row in series]))
+        outlook[name] = {f"p{p}": series[peak][f"{name}_p{p}"] for p in PERCENTILES}
+    return outlook
+
+
+__all__ = ["member_fields", "ensemble_series", "ensemble_outlook"]
@@ -1,7 +1,7 @@
 """Hazard detection logic."""
 from __future__ import annotations
 
-from typing import Dict, List
+from typing import List
 
 import pandas as pd
 
@@ -31,24 +31,6 @@ def detect_hazards(series: List[dict]) -> List[str]:
     return notes
 
 
-def compare_models(gfs: List[dict], ecmwf: List[dict]) -> List[str]:
-    notes: List[str] = []
-    if not gfs or not ecmwf:
-        return notes
-    g = pd.DataFrame(gfs)
-    e = pd.DataFrame(ecmwf)
-    merged = pd.merge(g, e, on="time_utc", suffixes=("_gfs", "_ecmwf"))
-    if "wind_speed_gfs" in merged and "wind_speed_ecmwf" in merged:
-        diff = (merged["wind_speed_gfs"] - merged["wind_speed_ecmwf"]).abs().max()
-        if diff > 10:
-            notes.append(f"Wind speed disagreement >10 kt (max diff {diff:.1f})")
-    if "swh_gfs" in merged and "swh_ecmwf" in merged:
-        diff = (merged["swh_gfs"] - merged["swh_ecmwf"]).abs().max()
-        if diff > 1.5:
-            notes.append(f"Wave height disagreement >1.5 m (max diff {diff:.1f})")
-    return notes
-
-
 def risk_assessment(series: List[dict]) -> str:
     if not series:
         return "No data"
@@ -63,4 +45,4 @@ def risk_assessment(series: List[dict]) -> str:
     return "No-Go"
 
 
-__all__ = ["detect_hazards", "compare_models", "risk_assessment"]
+__all__ = ["detect_hazards", "risk_assessment"]
@@ -38,6 +38,7 @@ class ModelConfig:
     name: str
     enabled: bool = True
     hours: List[int] = field(default_factory=lambda: [0, 3, 6, 9, 12, 15, 18, 21, 24, 30, 36, 42, 48, 54, 60, 66, 72])
+    members: int = 0
 
 
 @dataclass
@@ -46,13 +47,23 @@ class Config:
     data_dir: str
     grib_dir: str
     forecast_dir: str
+    store_dir: str
+    regrid_dir: str
+    tiles_dir: str
+    routes_path: str
     domain: str
     api_token: str
     gfs: ModelConfig
     ecmwf: ModelConfig
+    gefs: ModelConfig
+    ecmwf_ens: ModelConfig
     scheduler_cron: str
     default_route: str = "lakecharles-kemah"
     vessel_speed: float = 6.0
+    profile: bool = False
+    ensemble_chunk: int = 10
+    route_bbox_pad: float = 1.0
+    decode_memory_mb: int = 64
 
 
 DEFAULT_BBOX = (-98.0, -90.0, 27.0, 31.0)
@@ -67,25 +78,52 @@ def load_config() -> Config:
     base_data_dir = os.getenv("WX_DATA_DIR", "data")
     grib_dir = os.getenv("WX_GRIB_DIR", os.path.join(base_data_dir, "grib"))
     forecast_dir = os.getenv("WX_FORECAST_DIR", os.path.join(base_data_dir, "forecasts"))
+    store_dir = os.getenv("WX_STORE_DIR", os.path.join(base_data_dir, "store"))
+    regrid_dir = os.getenv("WX_REGRID_DIR", os.path.join(base_data_dir, "regrid"))
+    tiles_dir = os.getenv("WX_TILES_DIR", os.path.join(base_data_dir, "tiles"))
+    routes_path = os.getenv("WX_ROUTES_FILE", os.path.join(base_data_dir, "routes.json"))
 
     gfs_hours = _env_list("WX_GFS_HOURS", [0, 3, 6, 9, 12, 15, 18, 21, 24, 30, 36, 42, 48, 54, 60, 66, 72])
     ecmwf_hours = _env_list("WX_ECMWF_HOURS", [0, 3, 6, 9, 12, 15, 18, 21, 24, 30, 36, 42, 48, 54, 60])
+    gefs_hours = _env_list("WX_GEFS_HOURS", [0, 6, 12, 18, 24, 30, 36, 42, 48, 54, 60, 66, 72])
+    ecmwf_ens_hours = _env_list("WX_ECMWF_ENS_HOURS", [0, 6, 12, 18, 24, 30, 36, 42, 48, 54, 60])
 
     config = Config(
         bbox=(west, east, south, north),
         data_dir=base_data_dir,
         grib_dir=grib_dir,
         forecast_dir=forecast_dir,
+        store_dir=store_dir,
+        regrid_dir=regrid_dir,
+        tiles_dir=tiles_dir,
+        routes_path=routes_path,
         domain=os.getenv("WX_DOMAIN", "localhost"),
         api_token=os.getenv("WX_API_TOKEN", "changeme"),
         gfs=ModelConfig(name="gfs", enabled=os.getenv("WX_GFS_ENABLED", "1") == "1", hours=gfs_hours),
         ecmwf=ModelConfig(name="ecmwf", enabled=os.getenv("WX_ECMWF_ENABLED", "1") == "1", hours=ecmwf_hours),
+        gefs=ModelConfig(
+            name="gefs",
+            enabled=os.getenv("WX_GEFS_ENABLED", "0") == "1",
+            hours=gefs_hours,
+            members=_env_int("WX_GEFS_MEMBERS", 30),
+        ),
+        ecmwf_ens=ModelConfig(
+            name="ecmwf_ens",
+            enabled=os.getenv("WX_ECMWF_ENS_ENABLED", "0") == "1",
+            hours=ecmwf_ens_hours,
+            members=_env_int("WX_ECMWF_ENS_MEMBERS", 50),
+        ),
         scheduler_cron=os.getenv("WX_SCHEDULER_CRON", "0 */6 * * *"),
         default_route=os.getenv("WX_DEFAULT_ROUTE", "lakecharles-kemah"),
         vessel_speed=_env_float("WX_DEFAULT_SPEED", 6.0),
+        profile=os.getenv("WX_PROFILE", "0") == "1",
+        ensemble_chunk=max(1, _env_int("WX_ENSEMBLE_CHUNK", 10)),
+        route_bbox_pad=_env_float("WX_ROUTE_BBOX_PAD", 1.0),
+        decode_memory_mb=max(1, _env_int("WX_DECODE_MEMORY_MB", 64)),
     )
     os.makedirs(config.grib_dir, exist_ok=True)
     os.makedirs(config.forecast_dir, exist_ok=True)
+    os.makedirs(config.store_dir, exist_ok=True)
     return config
 
 
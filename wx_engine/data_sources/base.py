@@ -8,6 +8,8 @@ from typing import Dict
 
 import requests
 
+from wx_engine.metrics import DOWNLOAD_BYTES, record_cache, timed
+
 logger = logging.getLogger(__name__)
 
 
@@ -24,18 +26,27 @@ class BaseDownloader:
         self.hours = hours
         self.base_dir.mkdir(parents=True, exist_ok=True)
 
-    def fetch(self, cycle: str) -> Dict[int, Path]:
+    def default_cycle(self) -> str:
+        """Latest cycle (YYYYMMDDHH) expected to be published."""
+        raise NotImplementedError
+
+    def fetch(self, cycle: str, bbox=None) -> Dict[int, Path]:
+        """Files for ``cycle`` keyed by forecast hour; ``bbox`` overrides the default crop where supported."""
         raise NotImplementedError
 
     def download_file(self, url: str, dest: Path) -> Path:
         dest.parent.mkdir(parents=True, exist_ok=True)
         if dest.exists():
             logger.info("%s already exists, skipping", dest)
+            record_cache("grib_file", hit=True)
             return dest
+        record_cache("grib_file", hit=False)
         logger.info("Downloading %s", url)
-        resp = requests.get(url, timeout=120)
+        with timed("download_file", self.model):
+            resp = requests.get(url, timeout=120)
         if resp.status_code != 200:
             raise DownloaderError(f"Failed to download {url}: {resp.status_code}")
+        DOWNLOAD_BYTES.observe(len(resp.content), model=self.model)
         dest.write_bytes(resp.content)
         return dest
 
@@ -14,15 +14,18 @@ ECMWF_BASE = "https://data.ecmwf.int/forecasts"
 class ECMWFDownloader(BaseDownloader):
     model = "ecmwf"
 
-    def fetch(self, cycle: str | None = None) -> Dict[int, Path]:
+    def default_cycle(self) -> str:
+        now = dt.datetime.utcnow()
+        hour = 0 if now.hour < 12 else 12
+        return now.replace(hour=hour, minute=0, second=0, microsecond=0).strftime("%Y%m%d%H")
+
+    def fetch(self, cycle: str | None = None, bbox=None) -> Dict[int, Path]:
         """Download ECMWF open data GRIB files.
 
         This uses the public open-data layout. The bbox cropping is left to the decoder.
         """
         if not cycle:
-            now = dt.datetime.utcnow()
-            hour = 0 if now.hour < 12 else 12
-            cycle = now.replace(hour=hour, minute=0, second=0, microsecond=0).strftime("%Y%m%d%H")
+            cycle = self.default_cycle()
         day = cycle[:8]
         hour = cycle[8:]
         paths: Dict[int, Path] = {}
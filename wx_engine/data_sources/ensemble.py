@@ -0,0 +1,109 @@
+"""GEFS and ECMWF ENS ensemble downloaders."""
+from __future__ import annotations
+
+import datetime as dt
+from pathlib import Path
+from typing import Dict
+
+from wx_engine.data_sources.base import BaseDownloader
+
+
+GEFS_BASE = "https://nomads.ncep.noaa.gov/pub/data/nccf/com/gens/prod"
+GEFS_FILTER = "https://nomads.ncep.noaa.gov/cgi-bin/filter_gefs_atmos_0p25s.pl"
+ECMWF_ENS_BASE = "https://data.ecmwf.int/forecasts"
+
+MemberFiles = Dict[int, Dict[int, Path]]
+
+
+class EnsembleDownloader(BaseDownloader):
+    """Downloader whose ``fetch`` returns ``{member: {fhour: path}}``.
+
+    Member 0 is the control run.
+    """
+
+    def __init__(self, base_dir: str, bbox, hours, members: int):
+        super().__init__(base_dir, bbox, hours)
+        self.members = members
+
+    def fetch(self, cycle: str | None = None, bbox=None) -> MemberFiles:
+        raise NotImplementedError
+
+
+class GEFSDownloader(EnsembleDownloader):
+    model = "gefs"
+
+    def default_cycle(self) -> str:
+        now = dt.datetime.utcnow()
+        hour = (now.hour // 6) * 6
+        return now.replace(hour=hour, minute=0, second=0, microsecond=0).strftime("%Y%m%d%H")
+
+    def fetch(self, cycle: str | None = None, bbox=None) -> MemberFiles:
+        """Download GEFS 0.25 degree member files (one file per member and hour).
+
+        With a bbox, the NOMADS grib filter returns only that subregion, and
+        files are cached per bbox, as for GFS.
+        """
+        if not cycle:
+            cycle = self.default_cycle()
+        day = cycle[:8]
+        hour = cycle[8:]
+        folder = f"gefs.{day}/{hour}/atmos/pgrb2sp25"
+        bbox = bbox or self.bbox
+        members: MemberFiles = {}
+        for member in range(self.members + 1):
+            prefix = "gec00" if member == 0 else f"gep{member:02d}"
+            paths: Dict[int, Path] = {}
+            for fhour in self.hours:
+                fn = f"{prefix}.t{hour}z.pgrb2s.0p25.f{fhour:03d}"
+                if bbox:
+                    west, east, south, north = bbox
+                    url = (
+                        f"{GEFS_FILTER}?dir=%2F{folder.replace('/', '%2F')}&file={fn}&all_var=on&all_lev=on"
+                        f"&subregion=&leftlon={west:g}&rightlon={east:g}&toplat={north:g}&bottomlat={south:g}"
+                    )
+                    dest = self.base_dir / "gefs" / day / hour / f"{west:g}_{east:g}_{south:g}_{north:g}" / fn
+                else:
+                    url = f"{GEFS_BASE}/{folder}/{fn}"
+                    dest = self.base_dir / "gefs" / day / hour / fn
+                try:
+                    paths[fhour] = self.download_file(url, dest)
+                except Exception:
+                    continue
+            if paths:
+                members[member] = paths
+        return members
+
+
+class ECMWFEnsembleDownloader(EnsembleDownloader):
+    model = "ecmwf_ens"
+
+    def default_cycle(self) -> str:
+        now = dt.datetime.utcnow()
+        hour = 0 if now.hour < 12 else 12
+        return now.replace(hour=hour, minute=0, second=0, microsecond=0).strftime("%Y%m%d%H")
+
+    def fetch(self, cycle: str | None = None, bbox=None) -> MemberFiles:
+        """Download ECMWF ENS open data.
+
+        Each step is a single file holding every member, so all members map to
+        the same paths and the decoder splits them on the GRIB ``number`` key.
+        """
+        if not cycle:
+            cycle = self.default_cycle()
+        day = cycle[:8]
+        hour = cycle[8:]
+        paths: Dict[int, Path] = {}
+        for fhour in self.hours:
+            fn = f"{day}{hour}0000-{fhour}h-enfo-ef.grib2"
+            url = f"{ECMWF_ENS_BASE}/{day}/{hour}z/ifs/0p25/enfo/{fn}"
+            dest = self.base_dir / "ecmwf_ens" / day / hour / fn
+            try:
+                paths[fhour] = self.download_file(url, dest)
+            except Exception:
+                continue
+        if not paths:
+            return {}
+        return {member: paths for member in range(self.members + 1)}
+
+
+__all__ = ["EnsembleDownloader", "GEFSDownloader", "ECMWFEnsembleDownloader", "MemberFiles"]
@@ -9,30 +9,45 @@ from wx_engine.data_sources.base import BaseDownloader
 
 
 GFS_BASE = "https://nomads.ncep.noaa.gov/pub/data/nccf/com/gfs/prod"
+GFS_FILTER = "https://nomads.ncep.noaa.gov/cgi-bin/filter_gfs_0p25.pl"
 
 
 class GFSDownloader(BaseDownloader):
     model = "gfs"
 
-    def fetch(self, cycle: str | None = None) -> Dict[int, Path]:
+    def default_cycle(self) -> str:
+        now = dt.datetime.utcnow()
+        hour = (now.hour // 6) * 6
+        if hour == 24:
+            hour = 18
+        return (now.replace(hour=hour, minute=0, second=0, microsecond=0)).strftime("%Y%m%d%H")
+
+    def fetch(self, cycle: str | None = None, bbox=None) -> Dict[int, Path]:
         """Download GFS GRIB2 files for configured hours.
 
         cycle format: YYYYMMDDHH. Defaults to latest 00/06/12/18 before now.
+        With a bbox, the NOMADS grib filter returns only that subregion, and
+        files are cached per bbox.
         """
         if not cycle:
-            now = dt.datetime.utcnow()
-            hour = (now.hour // 6) * 6
-            if hour == 24:
-                hour = 18
-            cycle = (now.replace(hour=hour, minute=0, second=0, microsecond=0)).strftime("%Y%m%d%H")
+            cycle = self.default_cycle()
         day = cycle[:8]
         hour = cycle[8:]
         folder = f"gfs.{day}/{hour}/atmos"
+        bbox = bbox or self.bbox
         paths: Dict[int, Path] = {}
         for fhour in self.hours:
             fn = f"gfs.t{hour}z.pgrb2.0p25.f{fhour:03d}"
-            url = f"{GFS_BASE}/{folder}/{fn}"
-            dest = self.base_dir / "gfs" / day / hour / fn
+            if bbox:
+                west, east, south, north = bbox
+                url = (
+                    f"{GFS_FILTER}?dir=%2F{folder.replace('/', '%2F')}&file={fn}&all_var=on&all_lev=on"
+                    f"&subregion=&leftlon={west:g}&rightlon={east:g}&toplat={north:g}&bottomlat={south:g}"
+                )
+                dest = self.base_dir / "gfs" / day / hour / f"{west:g}_{east:g}_{south:g}_{north:g}" / fn
+            else:
+                url = f"{GFS_BASE}/{folder}/{fn}"
+                dest = self.base_dir / "gfs" / day / hour / fn
             try:
                 paths[fhour] = self.download_file(url, dest)
             except Exception:
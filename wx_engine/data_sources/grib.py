@@ -3,11 +3,12 @@ from __future__ import annotations
 
 import logging
 from pathlib import Path
-from typing import Dict
+from typing import Dict, List, Optional, Tuple
 
-import numpy as np
 import xarray as xr
 
+from wx_engine.metrics import DATASET_BYTES, FILES_DECODED
+
 logger = logging.getLogger(__name__)
 
 
@@ -28,43 +29,90 @@ class GribDecoder:
     def __init__(self, bbox):
         self.bbox = bbox
 
-    def load_dataset(self, file_paths: Dict[int, Path]) -> xr.Dataset:
-        datasets = []
-        for hour, path in file_paths.items():
+    def open_hours(
+        self, file_paths: Dict[int, Path], filter_by_keys: Optional[dict] = None, bbox=None
+    ) -> List[Tuple[int, xr.Dataset]]:
+        """Open each forecast hour lazily, cropped to the bbox, in forecast-hour order.
+
+        Nothing beyond GRIB metadata is read until a caller pulls values, so
+        consumers can stream hour by hour (and tile by tile) instead of
+        holding the whole cycle in memory. ``filter_by_keys`` is passed to
+        cfgrib to open only matching messages; ``bbox`` overrides the
+        decoder's default crop for this call.
+        """
+        backend_kwargs = {"filter_by_keys": filter_by_keys} if filter_by_keys else {}
+        hours: List[Tuple[int, xr.Dataset]] = []
+        for hour, path in sorted(file_paths.items()):
             try:
-                ds = xr.open_dataset(path, engine="cfgrib")
+                ds = xr.open_dataset(path, engine="cfgrib", backend_kwargs=backend_kwargs)
             except Exception as exc:
                 logger.warning("Failed to open %s: %s", path, exc)
+                FILES_DECODED.inc(result="error")
                 continue
+            FILES_DECODED.inc(result="ok")
             ds = self._rename_variables(ds)
-            ds = self._subset_bbox(ds)
-            ds = ds.assign_coords(fhour=hour)
-            datasets.append(ds)
-        if not datasets:
+            ds = self._subset_bbox(ds, bbox)
+            hours.append((hour, ds.assign_coords(fhour=hour)))
+        return hours
+
+    def load_ensemble(self, member_files: Dict[int, Dict[int, Path]], bbox=None) -> xr.Dataset:
+        """Decode only the requested ensemble members into one dataset with a ``member`` dimension.
+
+        Members sharing the same files (ECMWF ENS packs every member per step)
+        are opened lazily and selected on the GRIB ``number`` dimension before
+        any values are read, so memory follows the members asked for, not the
+        members in the file. The control (``dataType=cf``) and perturbed
+        (``pf``) messages are opened separately, as cfgrib cannot merge them.
+        """
+        groups: Dict[Tuple[Tuple[int, str], ...], List[int]] = {}
+        for member, files in sorted(member_files.items()):
+            key = tuple(sorted((h, str(p)) for h, p in files.items()))
+            groups.setdefault(key, []).append(member)
+        parts = []
+        for key, members in groups.items():
+            files = {h: Path(p) for h, p in key}
+            for data_type, wanted in (("cf", [m for m in members if m == 0]), ("pf", [m for m in members if m])):
+                if wanted:
+                    parts.append(self._load_members(files, data_type, wanted, bbox))
+        if not parts:
             raise FileNotFoundError("No GRIB datasets decoded")
-        combined = xr.concat(datasets, dim="fhour")
+        combined = xr.concat(parts, dim="member") if len(parts) > 1 else parts[0]
+        DATASET_BYTES.observe(combined.nbytes)
         return combined
 
+    def _load_members(self, files: Dict[int, Path], data_type: str, members: List[int], bbox=None) -> xr.Dataset:
+        datasets = []
+        for _, ds in self.open_hours(files, {"dataType": data_type}, bbox):
+            if "number" in ds.dims:
+                ds = ds.rename({"number": "member"}).sel(member=members)
+            else:
+                # one member per file (GEFS) or the control run
+                ds = ds.drop_vars("number", errors="ignore").expand_dims(member=members)
+            datasets.append(ds.load())
+        if not datasets:
+            raise FileNotFoundError(f"No {data_type} GRIB messages decoded")
+        return xr.concat(datasets, dim="fhour")
+
     def _rename_variables(self, ds: xr.Dataset) -> xr.Dataset:
         rename = {k: v for k, v in VARIABLE_MAP.items() if k in ds}
         return ds.rename(rename)
 
-    def _subset_bbox(self, ds: xr.Dataset) -> xr.Dataset:
-        west, east, south, north = self.bbox
+    def _subset_bbox(self, ds: xr.Dataset, bbox=None) -> xr.Dataset:
+        """Crop with label slices so lazily opened data is only read inside the bbox."""
+        west, east, south, north = bbox or self.bbox
         lon_name = "longitude" if "longitude" in ds.coords else "lon"
         lat_name = "latitude" if "latitude" in ds.coords else "lat"
         lon = ds[lon_name]
         lat = ds[lat_name]
-        subset = ds.where(
-            (lon >= west) & (lon <= east) & (lat >= south) & (lat <= north), drop=True
-        )
-        return subset
-
-
-def wind_dir_speed(u: xr.DataArray, v: xr.DataArray) -> xr.Dataset:
-    speed = np.sqrt(u ** 2 + v ** 2)
-    direction = (270 - np.rad2deg(np.arctan2(v, u))) % 360
-    return xr.Dataset({"wind_speed": speed, "wind_dir": direction})
+        if lon.ndim != 1 or lat.ndim != 1:
+            return ds.where(
+                (lon >= west) & (lon <= east) & (lat >= south) & (lat <= north), drop=True
+            )
+        if float(lon.max()) > 180:
+            # GFS-style 0..360 longitudes
+            west, east = west % 360, east % 360
+        lat_slice = slice(north, south) if lat.values[0] > lat.values[-1] else slice(south, north)
+        return ds.sel({lon_name: slice(west, east), lat_name: lat_slice})
 
 
-__all__ = ["GribDecoder", "wind_dir_speed"]
+__all__ = ["GribDecoder"]
@@ -0,0 +1,108 @@
+"""Registry of derived variables evaluated on demand.
+
+Formulas take and return arrays (numpy or xarray), so the same definition
+serves a few hundred sampled track points or, when a gridded product asks
+for it, a full field.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import xarray as xr
+
+MS_TO_KT = 1.943844
+GRAVITY = 9.80665
+
+
+@dataclass(frozen=True)
+class DerivedVariable:
+    name: str
+    inputs: Tuple[str, ...]
+    func: Callable
+    units: str = ""
+    description: str = ""
+
+
+DERIVED: Dict[str, DerivedVariable] = {}
+
+
+def register_derived(name: str, inputs: Iterable[str], units: str = "", description: str = ""):
+    """Register ``func(*inputs)`` as the formula for ``name``; inputs may themselves be derived."""
+    def decorator(func: Callable) -> Callable:
+        DERIVED[name] = DerivedVariable(name, tuple(inputs), func, units, description)
+        return func
+    return decorator
+
+
+@register_derived("wind_speed", ("u10", "v10"), "m/s", "10 m wind speed")
+def _wind_speed(u, v):
+    return np.sqrt(u ** 2 + v ** 2)
+
+
+@register_derived("wind_dir", ("u10", "v10"), "deg", "10 m wind direction (from)")
+def _wind_dir(u, v):
+    return (270 - np.rad2deg(np.arctan2(v, u))) % 360
+
+
+@register_derived("wind_speed_kt", ("wind_speed",), "kt")
+def _wind_speed_kt(speed):
+    return speed * MS_TO_KT
+
+
+@register_derived("gust_kt", ("gust",), "kt")
+def _gust_kt(gust):
+    return gust * MS_TO_KT
+
+
+@register_derived("gust_factor", ("gust", "wind_speed"), "", "Gust over sustained wind (wind floored at 1)")
+def _gust_factor(gust, speed):
+    return gust / np.maximum(speed, 1)
+
+
+@register_derived("wave_steepness", ("swh", "dwp"), "", "Significant height over deep-water wavelength")
+def _wave_steepness(swh, period):
+    wavelength = GRAVITY * period ** 2 / (2 * np.pi)
+    return swh / np.where(wavelength > 0, wavelength, np.nan)
+
+
+@register_derived("mslp_hpa", ("mslp",), "hPa")
+def _mslp_hpa(mslp):
+    return mslp / 100.0
+
+
+def _resolve(ds: xr.Dataset, name: str, cache: Dict[str, Optional[xr.DataArray]]) -> Optional[xr.DataArray]:
+    if name in cache:
+        return cache[name]
+    if name in ds:
+        return ds[name]
+    spec = DERIVED.get(name)
+    result = None
+    if spec is not None:
+        cache[name] = None  # guards against cycles
+        args = [_resolve(ds, dep, cache) for dep in spec.inputs]
+        if all(a is not None for a in args):
+            result = spec.func(*args)
+    cache[name] = result
+    return result
+
+
+def derive(ds: xr.Dataset, names: Optional[Iterable[str]] = None) -> xr.Dataset:
+    """Add the requested derived variables (default: all registered) that ``ds`` can support.
+
+    Call on point samples after extraction; call on a gridded dataset only
+    when a gridded product needs the field.
+    """
+    cache: Dict[str, Optional[xr.DataArray]] = {}
+    added = {}
+    for name in DERIVED if names is None else names:
+        if name in ds:
+            continue
+        value = _resolve(ds, name, cache)
+        if value is not None:
+            added[name] = value
+    return ds.assign(added) if added else ds
+
+
+__all__ = ["DERIVED", "DerivedVariable", "MS_TO_KT", "derive", "register_derived"]
@@ -1,34 +1,122 @@
 """Interpolation helpers for model data to track points."""
 from __future__ import annotations
 
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Dict, List
 
 import numpy as np
 import pandas as pd
 import xarray as xr
 
+from wx_engine.interp.derived import derive
+
+
+POINT_VARIABLES = ["wind_speed", "wind_dir", "gust", "mslp", "prate", "swh", "dwp", "mwd", "cape"]
+# Derived at the sampled points after extraction, never over the grid
+POINT_DERIVED = ["wind_speed", "wind_dir", "wind_speed_kt", "gust_kt", "gust_factor", "wave_steepness"]
+
+
+def _coord_names(ds: xr.Dataset):
+    lon_name = "longitude" if "longitude" in ds.coords else "lon"
+    lat_name = "latitude" if "latitude" in ds.coords else "lat"
+    return lat_name, lon_name
+
+
+def _nearest(values: np.ndarray, queries: np.ndarray) -> np.ndarray:
+    """Index into ``values`` of the nearest element for each query, via a sorted search."""
+    if len(values) == 1:
+        return np.zeros(len(queries), dtype=int)
+    order = np.argsort(values)
+    ordered = values[order]
+    pos = np.clip(np.searchsorted(ordered, queries), 1, len(ordered) - 1)
+    left = queries - ordered[pos - 1] <= ordered[pos] - queries
+    return order[np.where(left, pos - 1, pos)]
+
+
+def _fhour_indices(ds: xr.Dataset, times: np.ndarray) -> np.ndarray:
+    """Index of the nearest forecast hour for each UTC ``datetime64`` time.
+
+    Uses the decoded ``valid_time`` when present; otherwise falls back to
+    matching the hour of day against the forecast hour.
+    """
+    stamps = times.astype("datetime64[s]")
+    if "valid_time" in ds.coords and ds["valid_time"].dims == ("fhour",):
+        valid = ds["valid_time"].values.astype("datetime64[s]").astype(np.int64)
+        return _nearest(valid, stamps.astype(np.int64))
+    hours = (stamps.astype("datetime64[h]") - stamps.astype("datetime64[D]")).astype(np.int64)
+    return _nearest(np.asarray(ds.fhour.values), hours)
+
+
+def sample_arrays(
+    ds: xr.Dataset, lats: np.ndarray, lons: np.ndarray, times: np.ndarray, mask_outside: bool = False
+) -> xr.Dataset:
+    """Nearest-neighbour sample of every variable at ``(lat, lon, time)`` in one indexing pass.
+
+    The result has a ``point`` dimension in place of ``fhour``/lat/lon; any
+    other dimension (e.g. ``member``) is kept, so ensembles are sampled
+    without looping over members. ``times`` are naive UTC ``datetime64``.
+    With ``mask_outside`` points beyond the grid extent, or more than half
+    a forecast step outside the cycle's valid times, come back as NaN
+    instead of snapping to the nearest edge cell or hour.
+    """
+    lat_name, lon_name = _coord_names(ds)
+    lats = np.asarray(lats, dtype=float)
+    lons = np.asarray(lons, dtype=float)
+    # Match the grid's longitude convention (0..360 or -180..180)
+    lons = lons % 360 if float(ds[lon_name].max()) > 180 else (lons + 180) % 360 - 180
+    lat_idx = ds.indexes[lat_name].get_indexer(lats, method="nearest")
+    lon_idx = ds.indexes[lon_name].get_indexer(lons, method="nearest")
+    fhour_idx = _fhour_indices(ds, np.asarray(times))
+    sampled = ds.isel(
+        {
+            "fhour": xr.DataArray(fhour_idx, dims="point"),
+            lat_name: xr.DataArray(lat_idx, dims="point"),
+            lon_name: xr.DataArray(lon_idx, dims="point"),
+        }
+    )
+    if mask_outside:
+        grid_lats, grid_lons = ds[lat_name].values, ds[lon_name].values
+        inside = (
+            (lats >= grid_lats.min()) & (lats <= grid_lats.max()) & (lons >= grid_lons.min()) & (lons <= grid_lons.max())
+        )
+        if "valid_time" in ds.coords and ds["valid_time"].dims == ("fhour",):
+            valid = np.sort(ds["valid_time"].values.astype("datetime64[s]").astype(np.int64))
+            half_step = np.diff(valid).min() / 2 if len(valid) > 1 else 0
+            stamps = np.asarray(times).astype("datetime64[s]").astype(np.int64)
+            inside &= (stamps >= valid[0] - half_step) & (stamps <= valid[-1] + half_step)
+        if not inside.all():
+            sampled = sampled.where(xr.DataArray(inside, dims="point"))
+    return sampled
+
+
+def sample_points(ds: xr.Dataset, points: List[dict]) -> xr.Dataset:
+    """``sample_arrays`` for a list of track points."""
+    times = np.array(
+        [pt["time_utc"].astimezone(timezone.utc).replace(tzinfo=None) for pt in points], dtype="datetime64[s]"
+    )
+    return sample_arrays(ds, [pt["lat"] for pt in points], [pt["lon"] for pt in points], times)
+
 
 def interpolate_fields(ds: xr.Dataset, points: List[dict]) -> List[dict]:
     results: List[dict] = []
-    if ds is None:
+    if ds is None or not points:
         return results
-    lon_name = "longitude" if "longitude" in ds.coords else "lon"
-    lat_name = "latitude" if "latitude" in ds.coords else "lat"
-    for pt in points:
-        time_hour = getattr(pt.get("time_utc"), "hour", 0)
-        fhour = min(ds.fhour.values, key=lambda h: abs(h - time_hour))
-        subset = ds.sel({lon_name: pt["lon"], lat_name: pt["lat"]}, method="nearest").sel(fhour=fhour)
+    sampled = derive(sample_points(ds, points), POINT_DERIVED)
+    columns = {
+        var: sampled[var].values.astype(float)
+        for var in dict.fromkeys(POINT_VARIABLES + POINT_DERIVED)
+        if var in sampled
+    }
+    fhours = sampled["fhour"].values
+    for i, pt in enumerate(points):
         row = {
             "time_utc": pt["time_utc"],
             "lat": pt["lat"],
             "lon": pt["lon"],
-            "source_fhour": int(fhour),
+            "source_fhour": int(fhours[i]),
         }
-        for var in ["wind_speed", "wind_dir", "gust", "mslp", "prate", "swh", "dwp", "mwd", "cape"]:
-            if var in subset:
-                val = subset[var].item() if hasattr(subset[var], "item") else float(subset[var])
-                row[var] = float(val)
+        for var, values in columns.items():
+            row[var] = float(values[i])
         results.append(row)
     return results
 
@@ -37,11 +125,21 @@ def summarize_series(series: List[dict]) -> Dict[str, float]:
     if not series:
         return {}
     df = pd.DataFrame(series)
+    # Knots when the kt columns were derived, so the "kt" summary matches the timeline and ensemble bands
+    wind = df["wind_speed_kt"] if "wind_speed_kt" in df else df.get("wind_speed", pd.Series(dtype=float))
+    gust = df["gust_kt"] if "gust_kt" in df else df.get("gust", pd.Series(dtype=float))
     return {
-        "max_wind": float(df.get("wind_speed", pd.Series(dtype=float)).max() or 0),
-        "max_gust": float(df.get("gust", pd.Series(dtype=float)).max() or 0),
+        "max_wind": float(wind.max() or 0),
+        "max_gust": float(gust.max() or 0),
         "max_swh": float(df.get("swh", pd.Series(dtype=float)).max() or 0),
     }
 
 
-__all__ = ["interpolate_fields", "summarize_series"]
+__all__ = [
+    "POINT_DERIVED",
+    "POINT_VARIABLES",
+    "interpolate_fields",
+    "sample_arrays",
+    "sample_points",
+    "summarize_series",
+]
@@ -0,0 +1,140 @@
+"""Bilinear regridding with weights computed once per grid pair and cached on disk."""
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import xarray as xr
+
+from wx_engine.metrics import record_cache
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Grid:
+    """Rectilinear lat/lon grid described by its 1-D coordinate vectors."""
+
+    lats: np.ndarray
+    lons: np.ndarray
+
+    @classmethod
+    def from_dataset(cls, ds: xr.Dataset) -> "Grid":
+        lat_name = "latitude" if "latitude" in ds.coords else "lat"
+        lon_name = "longitude" if "longitude" in ds.coords else "lon"
+        return cls(np.asarray(ds[lat_name].values, dtype=float), np.asarray(ds[lon_name].values, dtype=float))
+
+    @classmethod
+    def regular(cls, bbox: Sequence[float], resolution: float) -> "Grid":
+        west, east, south, north = bbox
+        lats = np.arange(south, north + resolution / 2, resolution)
+        lons = np.arange(west, east + resolution / 2, resolution)
+        return cls(np.round(lats, 6), np.round(lons, 6))
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return len(self.lats), len(self.lons)
+
+    @property
+    def resolution(self) -> float:
+        steps = [np.abs(np.diff(c)).min() for c in (self.lats, self.lons) if len(c) > 1]
+        return float(max(steps)) if steps else 0.0
+
+    def key(self) -> str:
+        digest = hashlib.sha1()
+        for coord in (self.lats, self.lons):
+            digest.update(np.round(coord, 6).astype(np.float64).tobytes())
+        return digest.hexdigest()[:16]
+
+
+def _axis_weights(src: np.ndarray, dst: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Lower/upper source index and upper-neighbour weight for each target coordinate.
+
+    Targets outside the source range get NaN weights.
+    """
+    order = np.argsort(src)
+    sorted_src = src[order]
+    pos = np.clip(np.searchsorted(sorted_src, dst) - 1, 0, max(len(src) - 2, 0))
+    lo = sorted_src[pos]
+    hi = sorted_src[np.minimum(pos + 1, len(src) - 1)]
+    span = np.where(hi > lo, hi - lo, 1.0)
+    frac = np.clip((dst - lo) / span, 0.0, 1.0)
+    outside = (dst < sorted_src[0] - 1e-9) | (dst > sorted_src[-1] + 1e-9)
+    frac = np.where(outside, np.nan, frac)
+    return order[pos], order[np.minimum(pos + 1, len(src) - 1)], frac
+
+
+@dataclass
+class RegridWeights:
+    """Four-point gather indices into the flattened source grid and their weights."""
+
+    index: np.ndarray  # (4, n_target) int64
+    weight: np.ndarray  # (4, n_target) float32
+    shape: Tuple[int, int]
+
+    @classmethod
+    def bilinear(cls, src: Grid, dst: Grid) -> "RegridWeights":
+        dst_lons = dst.lons % 360 if src.lons.max() > 180 else dst.lons
+        lat0, lat1, fy = _axis_weights(src.lats, dst.lats)
+        lon0, lon1, fx = _axis_weights(src.lons, dst_lons)
+        nlon = len(src.lons)
+        y0, x0 = np.meshgrid(lat0, lon0, indexing="ij")
+        y1, x1 = np.meshgrid(lat1, lon1, indexing="ij")
+        wy, wx = np.meshgrid(fy, fx, indexing="ij")
+        index = np.stack([y0 * nlon + x0, y0 * nlon + x1, y1 * nlon + x0, y1 * nlon + x1]).reshape(4, -1)
+        weight = np.stack([(1 - wy) * (1 - wx), (1 - wy) * wx, wy * (1 - wx), wy * wx]).reshape(4, -1)
+        return cls(index.astype(np.int64), weight.astype(np.float32), dst.shape)
+
+    def apply(self, values: np.ndarray) -> np.ndarray:
+        """Regrid ``values[..., src_lat, src_lon]`` onto the target grid in one gather."""
+        flat = np.asarray(values).reshape(values.shape[:-2] + (-1,))
+        out = np.zeros(flat.shape[:-1] + (self.index.shape[1],), dtype=np.float32)
+        for k in range(4):
+            out += flat[..., self.index[k]] * self.weight[k]
+        return out.reshape(values.shape[:-2] + self.shape)
+
+
+class RegridCache:
+    """Weights keyed by (source grid, target grid), memoised in-process and on disk."""
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._weights: Dict[str, RegridWeights] = {}
+        self._lock = threading.Lock()
+
+    def get(self, src: Grid, dst: Grid) -> RegridWeights:
+        key = f"{src.key()}_{dst.key()}"
+        with self._lock:
+            weights = self._weights.get(key)
+            if weights is not None:
+                record_cache("regrid_weights", hit=True)
+                return weights
+            path = self.cache_dir / f"{key}.npz"
+            weights = self._load(path)
+            record_cache("regrid_weights", hit=weights is not None)
+            if weights is None:
+                weights = RegridWeights.bilinear(src, dst)
+                np.savez(path, index=weights.index, weight=weights.weight, shape=np.array(weights.shape))
+                logger.info("Computed regrid weights %s", key)
+            self._weights[key] = weights
+            return weights
+
+    @staticmethod
+    def _load(path: Path) -> Optional[RegridWeights]:
+        if not path.exists():
+            return None
+        try:
+            with np.load(path) as data:
+                return RegridWeights(data["index"], data["weight"], tuple(int(n) for n in data["shape"]))
+        except (OSError, KeyError, ValueError) as exc:
+            logger.warning("Ignoring unreadable regrid weights %s: %s", path, exc)
+            return None
+
+
+__all__ = ["Grid", "RegridCache", "RegridWeights"]
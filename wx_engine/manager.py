@@ -5,65 +5,256 @@ import json
 import logging
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
-from wx_engine.analysis.hazards import compare_models
+import numpy as np
+import xarray as xr
+
+from wx_engine.analysis.ensemble import ensemble_outlook, ensemble_series
+from wx_engine.analysis.consensus import build_consensus, consensus_notes
 from wx_engine.config import Config
+from wx_engine.data_sources.base import BaseDownloader
 from wx_engine.data_sources.ecmwf import ECMWFDownloader
+from wx_engine.data_sources.ensemble import ECMWFEnsembleDownloader, EnsembleDownloader, GEFSDownloader
 from wx_engine.data_sources.gfs import GFSDownloader
-from wx_engine.data_sources.grib import GribDecoder, wind_dir_speed
-from wx_engine.interp.interpolator import interpolate_fields
-from wx_engine.reports.briefing import build_markdown, markdown_to_html
+from wx_engine.data_sources.grib import GribDecoder
+from wx_engine.interp.interpolator import interpolate_fields, sample_points
+from wx_engine.interp.regrid import Grid, RegridCache
+from wx_engine.reports.briefing import render_briefing
+from wx_engine.reports.tiles import TileStore
 from wx_engine.reports.timeline import annotate_timeline
 from wx_engine.routing.track import generate_track
-from wx_engine.routes import Route, get_route
+from wx_engine.routes import BBox, Route, RouteRegistry
+from wx_engine.store import FieldStore, bbox_contains
+from wx_engine.tracing import Trace, span, trace
 
 logger = logging.getLogger(__name__)
 
+CONSENSUS = "consensus"
+
+
+def grid_covers(ds: xr.Dataset, bbox: BBox) -> bool:
+    """Whether the dataset's lat/lon grid spans ``bbox``, so nearest-cell sampling never snaps to an edge."""
+    grid = Grid.from_dataset(ds)
+    lons = np.where(grid.lons > 180, grid.lons - 360, grid.lons)
+    extent = (lons.min(), lons.max(), grid.lats.min(), grid.lats.max())
+    return bbox_contains(extent, bbox)
+
 
 class ForecastManager:
     def __init__(self, config: Config):
         self.config = config
         self.decoder = GribDecoder(config.bbox)
+        self.store = FieldStore(config.store_dir)
+        self.regrid = RegridCache(config.regrid_dir)
+        self.tiles = TileStore(config.tiles_dir)
+        self.routes = RouteRegistry(config.routes_path, pad=config.route_bbox_pad)
         self.gfs = GFSDownloader(config.grib_dir, config.bbox, config.gfs.hours)
         self.ecmwf = ECMWFDownloader(config.grib_dir, config.bbox, config.ecmwf.hours)
+        self.gefs = GEFSDownloader(config.grib_dir, config.bbox, config.gefs.hours, config.gefs.members)
+        self.ecmwf_ens = ECMWFEnsembleDownloader(
+            config.grib_dir, config.bbox, config.ecmwf_ens.hours, config.ecmwf_ens.members
+        )
+
+    def run(
+        self, route_id: str, departure: datetime, speed_knots: float, profile: Optional[bool] = None
+    ) -> Dict[str, dict]:
+        route = self.routes.get(route_id)
+        bbox = self.model_bbox([route.id])
+        if profile is None:
+            profile = self.config.profile
+        run_trace: Optional[Trace] = None
+        try:
+            with trace("run", profile=profile, route=route_id, speed_knots=speed_knots) as run_trace:
+                try:
+                    return self._run(route, departure, speed_knots, run_trace.run_id, bbox)
+                except Exception as exc:
+                    run_trace.root.set(error=repr(exc))
+                    raise
+        finally:
+            # Failed runs keep their trace and profile too; they are the ones worth reading
+            if run_trace is not None:
+                self._persist_trace(route_id, run_trace)
 
-    def run(self, route_id: str, departure: datetime, speed_knots: float) -> Dict[str, dict]:
-        route = get_route(route_id)
-        track = generate_track(route, departure, speed_knots)
+    def _run(
+        self, route: Route, departure: datetime, speed_knots: float, run_id: str, bbox: BBox
+    ) -> Dict[str, dict]:
+        with span("track") as sp:
+            track = generate_track(route, departure, speed_knots)
+            sp.set(points=len(track))
 
         model_results: Dict[str, dict] = {}
-        for model_name, downloader in [("gfs", self.gfs), ("ecmwf", self.ecmwf)]:
+        cycles: Dict[str, xr.Dataset] = {}
+        models = [("gfs", self.gfs), ("ecmwf", self.ecmwf), ("gefs", self.gefs), ("ecmwf_ens", self.ecmwf_ens)]
+        for model_name, downloader in models:
             if not getattr(self.config, model_name).enabled:
                 continue
-            files = downloader.fetch(None)
-            if not files:
-                logger.warning("No files fetched for %s", model_name)
-                continue
-            ds = self.decoder.load_dataset(files)
-            if "u10" in ds and "v10" in ds:
-                wind = wind_dir_speed(ds["u10"], ds["v10"])
-                ds = ds.assign({"wind_speed": wind["wind_speed"], "wind_dir": wind["wind_dir"]})
-            points = interpolate_fields(ds, track)
-            annotated = annotate_timeline(points)
-            md = build_markdown(route.name, model_name, annotated)
-            html = markdown_to_html(md)
-            model_results[model_name] = {
-                "route": route_id,
-                "model": model_name,
-                "departure": departure.isoformat(),
-                "track": annotated,
-                "markdown": md,
-                "html": html,
-            }
-            self._persist(route_id, model_name, model_results[model_name])
-
-        # model comparison notes
-        if "gfs" in model_results and "ecmwf" in model_results:
-            notes = compare_models(model_results["gfs"]["track"], model_results["ecmwf"]["track"])
-            model_results["comparison"] = {"notes": notes}
+            with span("model", model=model_name):
+                outlook = None
+                if isinstance(downloader, EnsembleDownloader):
+                    sampled = self._sample_ensemble(downloader, track, bbox)
+                    if sampled is None:
+                        continue
+                    points, outlook = sampled
+                else:
+                    ds = self.load_cycle(downloader, bbox)
+                    if ds is None:
+                        continue
+                    if not grid_covers(ds, route.bbox(snap=0.01)):
+                        # e.g. fell back to an older cycle published for a smaller area
+                        logger.warning(
+                            "%s cycle %s does not cover route %s", model_name, ds.attrs.get("cycle"), route.id
+                        )
+                        continue
+                    cycles[model_name] = ds
+                    with span("interpolate", points=len(track), cycle=ds.attrs.get("cycle")):
+                        points = interpolate_fields(ds, track)
+                with span("analyse", points=len(points)):
+                    annotated = annotate_timeline(points)
+                with span("render"):
+                    md, html = render_briefing(route.name, model_name, annotated, outlook=outlook)
+                model_results[model_name] = {
+                    "route": route.id,
+                    "model": model_name,
+                    "run_id": run_id,
+                    "departure": departure.isoformat(),
+                    "track": annotated,
+                    "markdown": md,
+                    "html": html,
+                }
+                if outlook is not None:
+                    model_results[model_name]["ensemble"] = outlook
+                with span("persist"):
+                    self._persist(route.id, model_name, model_results[model_name])
+
+        # model comparison notes from the consensus of every deterministic model
+        if len(cycles) >= 2:
+            with span("compare", models=len(cycles)):
+                consensus = self.load_consensus(cycles, bbox)
+                notes = consensus_notes(consensus, track) if consensus is not None else None
+            if notes is not None:
+                model_results["comparison"] = {"notes": notes, "models": sorted(cycles)}
         return model_results
 
+    def load_cycles(self, route_ids: List[str]) -> Dict[str, xr.Dataset]:
+        """Decode (or reuse) every enabled deterministic model over the union bbox of ``route_ids``.
+
+        A model whose available cycle does not cover every route (a fallback
+        published for a smaller area) is left out.
+        """
+        bbox = self.model_bbox(route_ids)
+        routes = [self.routes.get(route_id) for route_id in route_ids]
+        cycles: Dict[str, xr.Dataset] = {}
+        for model_name, downloader in (("gfs", self.gfs), ("ecmwf", self.ecmwf)):
+            if not getattr(self.config, model_name).enabled:
+                continue
+            with span("model", model=model_name):
+                ds = self.load_cycle(downloader, bbox)
+            if ds is None:
+                continue
+            missing = [r.id for r in routes if not grid_covers(ds, r.bbox(snap=0.01))]
+            if missing:
+                logger.warning("%s cycle %s does not cover routes %s", model_name, ds.attrs.get("cycle"), missing)
+                continue
+            cycles[model_name] = ds
+        return cycles
+
+    def model_bbox(self, route_ids: List[str]) -> BBox:
+        """Area to download and decode: the union of active routes plus ``route_ids``."""
+        bbox = self.routes.union_bbox(include=route_ids) or self.config.bbox
+        return tuple(float(b) for b in bbox)
+
+    def load_cycle(self, downloader: BaseDownloader, bbox: BBox) -> Optional[xr.Dataset]:
+        """Memory-mapped dataset for the downloader's latest cycle, decoding and publishing it if needed.
+
+        Any published version whose bbox contains ``bbox`` is reused. Falls
+        back to the previously published cycle when the new one cannot be
+        fetched yet; callers check it still covers what they sample.
+        """
+        model = downloader.model
+        cycle = downloader.default_cycle()
+        with self.store.lock(model):
+            if not self.store.has(model, cycle, bbox, downloader.hours):
+                with span("fetch", cycle=cycle) as sp:
+                    files = downloader.fetch(cycle, bbox)
+                    sp.set(files=len(files))
+                if files and self.store.covers(model, cycle, bbox, files):
+                    # Cycle still partly posted upstream and nothing new since the last publish
+                    logger.info("No new hours for %s cycle %s; keeping the published version", model, cycle)
+                else:
+                    self._publish_cycle(model, cycle, files, bbox)
+            ds = self.store.open(model)
+            if ds is not None and not self.tiles.has(model, ds.attrs["version"]):
+                # Map tiles are cut once per published version, never per view
+                with span("tiles", version=ds.attrs["version"]):
+                    self.tiles.write(ds)
+        return ds
+
+    def _publish_cycle(self, model: str, cycle: str, files: Dict[int, Path], bbox: BBox) -> None:
+        with span("decode", files=len(files)) as sp:
+            hours = self.decoder.open_hours(files, bbox=bbox) if files else []
+            sp.set(fhours=len(hours))
+            if not hours:
+                logger.warning("No files decoded for %s cycle %s", model, cycle)
+                return
+            version = self.store.publish_hours(
+                model, cycle, hours, bbox, self.config.decode_memory_mb * 1024 * 1024
+            )
+            sp.set(version=version.name)
+
+    def load_consensus(self, cycles: Dict[str, xr.Dataset], bbox: BBox) -> Optional[xr.Dataset]:
+        """Consensus/spread fields for this combination of model cycles, built once and shared via the store.
+
+        None when the cycles share no forecast time to compare.
+        """
+        # Store versions, not cycle strings: a cycle republished with more hours must rebuild
+        key = "+".join(f"{model}-{cycles[model].attrs['version']}" for model in sorted(cycles))
+        with self.store.lock(CONSENSUS):
+            if not self.store.has(CONSENSUS, key, bbox, []):
+                with span("regrid") as sp:
+                    consensus = build_consensus(cycles, bbox, self.regrid)
+                    sp.set(shape=list(consensus.sizes.values()))
+                if consensus.sizes.get("fhour", 0) == 0:
+                    logger.warning("No shared forecast times for consensus of %s", key)
+                    return None
+                self.store.publish(CONSENSUS, key, consensus, bbox)
+        return self.store.open(CONSENSUS)
+
+    def _sample_ensemble(
+        self, downloader: EnsembleDownloader, track: List[dict], bbox: BBox
+    ) -> Optional[Tuple[List[dict], dict]]:
+        """Sample all members at the track points, decoding ``ensemble_chunk`` members at a time.
+
+        Only the small ``(member, point)`` samples outlive each chunk, so peak
+        memory is bounded by the chunk size rather than the member count.
+        """
+        with span("fetch") as sp:
+            member_files = downloader.fetch(None, bbox)
+            sp.set(members=len(member_files), files=sum(len(f) for f in member_files.values()))
+        if not member_files:
+            logger.warning("No files fetched for %s", downloader.model)
+            return None
+        members = sorted(member_files)
+        chunk = self.config.ensemble_chunk
+        samples = []
+        for i in range(0, len(members), chunk):
+            group = members[i:i + chunk]
+            with span("decode", members=len(group)) as sp:
+                try:
+                    ds = self.decoder.load_ensemble({m: member_files[m] for m in group}, bbox)
+                except FileNotFoundError as exc:
+                    logger.warning("Skipping %s: members %s not decoded: %s", downloader.model, group, exc)
+                    return None
+                sp.set(fhours=int(ds.sizes.get("fhour", 0)), nbytes=int(ds.nbytes))
+            with span("interpolate", points=len(track), members=len(group)):
+                samples.append(sample_points(ds, track).load())
+            del ds
+        with span("ensemble", members=len(members)):
+            sampled = xr.concat(samples, dim="member") if len(samples) > 1 else samples[0]
+            points = ensemble_series(sampled, track)
+            outlook = ensemble_outlook(points, int(sampled.sizes["member"]))
+        return points, outlook
+
     def _persist(self, route_id: str, model: str, payload: dict) -> None:
         ts = datetime.now(tz=timezone.utc).strftime("%Y%m%d%H%M")
         out_dir = Path(self.config.forecast_dir) / route_id
@@ -76,5 +267,17 @@ class ForecastManager:
         (out_dir / f"latest_{model}.json").write_text(json.dumps(payload, default=str, indent=2))
         (out_dir / f"latest_{model}.html").write_text(html_page)
 
+    def _persist_trace(self, route_id: str, run_trace: Trace) -> None:
+        """Store the run's span tree (and profile, if captured) next to its forecasts."""
+        out_dir = Path(self.config.forecast_dir) / route_id
+        out_dir.mkdir(parents=True, exist_ok=True)
+        payload = run_trace.to_dict()
+        profile_path = run_trace.save_profile(out_dir / f"profile_{run_trace.run_id}.prof")
+        if profile_path is not None:
+            payload["profile"] = profile_path.name
+        text = json.dumps(payload, default=str, indent=2)
+        (out_dir / f"trace_{run_trace.run_id}.json").write_text(text)
+        (out_dir / "latest_trace.json").write_text(text)
+
 
 __all__ = ["ForecastManager"]
@@ -1,48 +1,183 @@
 """Markdown/HTML briefing generation."""
 from __future__ import annotations
 
+import html
+import io
+import math
 from datetime import datetime, timezone
-from typing import List
-
-import markdown
-import pandas as pd
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple
 
 from wx_engine.analysis.hazards import detect_hazards, risk_assessment
 from wx_engine.interp.interpolator import summarize_series
 
 
-def build_markdown(route_name: str, model: str, series: List[dict]) -> str:
+def _fmt(spec: str) -> Callable[[object], str]:
+    def fmt(value: object) -> str:
+        if value is None or (isinstance(value, float) and math.isnan(value)):
+            return ""
+        try:
+            return format(value, spec)
+        except (TypeError, ValueError):
+            return str(value)
+    return fmt
+
+
+def _fmt_time(value: object) -> str:
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M")
+    return "" if value is None else str(value)
+
+
+# Timeline columns in display order with their cell formatters.
+TIMELINE_COLUMNS: Sequence[Tuple[str, Callable[[object], str]]] = (
+    ("time_utc", _fmt_time),
+    ("wind_dir", _fmt(".0f")),
+    ("wind_speed_kt", _fmt(".1f")),
+    ("gust_kt", _fmt(".1f")),
+    ("swh", _fmt(".1f")),
+    ("dwp", _fmt(".1f")),
+    ("mwd", _fmt(".0f")),
+    ("mslp", _fmt(".0f")),
+    ("prate", _fmt(".2e")),
+    ("wind_kt_p10", _fmt(".1f")),
+    ("wind_kt_p90", _fmt(".1f")),
+    ("p_wind_25kt", _fmt(".0%")),
+    ("p_swh_2_5m", _fmt(".0%")),
+)
+
+_EXCEEDANCE_LABELS = {
+    "p_wind_25kt": "wind > 25 kt",
+    "p_gust_34kt": "gust > 34 kt",
+    "p_swh_2_5m": "significant wave height > 2.5 m",
+}
+_BAND_LABELS = {"wind_kt": ("Wind", "kt"), "gust_kt": ("Gust", "kt"), "swh_m": ("Significant wave height", "m")}
+
+_MD_TITLE = "# Marine Weather Brief – {route} ({model})\nIssued: {issued}\n"
+_HTML_TITLE = "<h1>Marine Weather Brief – {route} ({model})</h1>\n<p>Issued: {issued}</p>\n"
+_MD_SUMMARY = (
+    "\n## Summary\n"
+    "- Peak wind: {max_wind:.1f} kt\n"
+    "- Peak gust: {max_gust:.1f} kt\n"
+    "- Max significant wave height: {max_swh:.1f} m\n"
+    "- Risk: **{risk}**\n"
+)
+_HTML_SUMMARY = (
+    "<h2>Summary</h2>\n<ul>\n"
+    "<li>Peak wind: {max_wind:.1f} kt</li>\n"
+    "<li>Peak gust: {max_gust:.1f} kt</li>\n"
+    "<li>Max significant wave height: {max_swh:.1f} m</li>\n"
+    "<li>Risk: <strong>{risk}</strong></li>\n"
+    "</ul>\n"
+)
+
+
+class BriefingWriter:
+    """Writes the Markdown and HTML renditions of a briefing side by side."""
+
+    def __init__(self):
+        self.md = io.StringIO()
+        self.html = io.StringIO()
+
+    def write(self, md_template: str, html_template: str, **values: object) -> None:
+        self.md.write(md_template.format(**values))
+        escaped = {k: html.escape(v) if isinstance(v, str) else v for k, v in values.items()}
+        self.html.write(html_template.format(**escaped))
+
+    def heading(self, level: int, text: str) -> None:
+        self.md.write(f"\n{'#' * level} {text}\n")
+        self.html.write(f"<h{level}>{html.escape(text)}</h{level}>\n")
+
+    def paragraph(self, text: str) -> None:
+        self.md.write(f"{text}\n")
+        self.html.write(f"<p>{html.escape(text)}</p>\n")
+
+    def bullets(self, items: Iterable[str]) -> None:
+        self.html.write("<ul>\n")
+        for item in items:
+            self.md.write(f"- {item}\n")
+            self.html.write(f"<li>{html.escape(item)}</li>\n")
+        self.html.write("</ul>\n")
+
+    def table(self, headers: Sequence[str], rows: Iterable[Sequence[str]], numeric: Sequence[bool]) -> None:
+        md_write = self.md.write
+        html_write = self.html.write
+        md_write("| " + " | ".join(headers) + " |\n")
+        md_write("|" + "|".join("---:" if n else ":---" for n in numeric) + "|\n")
+        aligns = [' style="text-align: right;"' if n else ' style="text-align: left;"' for n in numeric]
+        html_write("<table>\n<thead>\n<tr>")
+        html_write("".join(f"<th{a}>{html.escape(h)}</th>" for a, h in zip(aligns, headers)))
+        html_write("</tr>\n</thead>\n<tbody>\n")
+        for cells in rows:
+            md_write("| " + " | ".join(cells) + " |\n")
+            html_write("<tr>" + "".join(f"<td{a}>{html.escape(c)}</td>" for a, c in zip(aligns, cells)) + "</tr>\n")
+        html_write("</tbody>\n</table>\n")
+
+    def getvalue(self) -> Tuple[str, str]:
+        return self.md.getvalue().rstrip("\n"), self.html.getvalue()
+
+
+def _write_timeline(writer: BriefingWriter, series: List[dict]) -> None:
+    writer.heading(2, "Timeline (UTC)")
+    present = set()
+    for row in series:
+        present.update(row)
+    columns = [(name, fmt) for name, fmt in TIMELINE_COLUMNS if name in present]
+    if not series or not columns:
+        writer.paragraph("No data available for timeline")
+        return
+    headers = [name for name, _ in columns]
+    numeric = [name != "time_utc" for name in headers]
+    rows = ([fmt(row.get(name)) for name, fmt in columns] for row in series)
+    writer.table(headers, rows, numeric)
+
+
+def _write_outlook(writer: BriefingWriter, outlook: dict) -> None:
+    writer.heading(2, "Ensemble outlook")
+    items = [f"Members: {outlook['members']}"]
+    for name, peak in outlook.get("exceedance", {}).items():
+        items.append(
+            f"Max P({_EXCEEDANCE_LABELS.get(name, name)}): {peak['max_probability']:.0%}"
+            f" at {_fmt_time(peak['time_utc'])}"
+        )
+    for name, (label, unit) in _BAND_LABELS.items():
+        if name in outlook:
+            band = outlook[name]
+            items.append(f"{label} at peak (10/50/90%): {band['p10']:.1f} / {band['p50']:.1f} / {band['p90']:.1f} {unit}")
+    writer.bullets(items)
+
+
+def render_briefing(
+    route_name: str, model: str, series: List[dict], outlook: Optional[dict] = None
+) -> Tuple[str, str]:
+    """Render the briefing as ``(markdown, html)`` in a single pass over ``series``.
+
+    ``outlook`` (from ``ensemble_outlook``) adds the probabilistic section.
+    """
     summary = summarize_series(series)
     hazards = detect_hazards(series)
     risk = risk_assessment(series)
-    lines = [f"# Marine Weather Brief – {route_name} ({model.upper()})"]
-    lines.append(f"Issued: {datetime.now(tz=timezone.utc).isoformat()}")
-    lines.append("")
-    lines.append("## Summary")
-    lines.append(f"- Peak wind: {summary.get('max_wind', 0):.1f} kt")
-    lines.append(f"- Peak gust: {summary.get('max_gust', 0):.1f} kt")
-    lines.append(f"- Max significant wave height: {summary.get('max_swh', 0):.1f} m")
-    lines.append(f"- Risk: **{risk}**")
-    lines.append("")
-    lines.append("## Hazards")
-    if hazards:
-        for h in hazards:
-            lines.append(f"- {h}")
-    else:
-        lines.append("- None detected from available fields")
-    lines.append("")
-    lines.append("## Timeline (UTC)")
-    df = pd.DataFrame(series)
-    if not df.empty:
-        df = df[[c for c in ["time_utc", "wind_dir", "wind_speed", "gust", "swh", "dwp", "mwd", "mslp", "prate"] if c in df]]
-        lines.append(df.to_markdown(index=False))
-    else:
-        lines.append("No data available for timeline")
-    return "\n".join(lines)
-
-
-def markdown_to_html(md_text: str) -> str:
-    return markdown.markdown(md_text, extensions=["tables", "fenced_code"])
-
-
-__all__ = ["build_markdown", "markdown_to_html"]
+    writer = BriefingWriter()
+    writer.write(
+        _MD_TITLE,
+        _HTML_TITLE,
+        route=route_name,
+        model=model.upper(),
+        issued=datetime.now(tz=timezone.utc).isoformat(),
+    )
+    writer.write(
+        _MD_SUMMARY,
+        _HTML_SUMMARY,
+        max_wind=summary.get("max_wind", 0),
+        max_gust=summary.get("max_gust", 0),
+        max_swh=summary.get("max_swh", 0),
+        risk=risk,
+    )
+    writer.heading(2, "Hazards")
+    writer.bullets(hazards or ["None detected from available fields"])
+    if outlook:
+        _write_outlook(writer, outlook)
+    _write_timeline(writer, series)
+    return writer.getvalue()
+
+
+__all__ = ["BriefingWriter", "render_briefing"]
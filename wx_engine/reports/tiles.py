@@ -0,0 +1,146 @@
+"""Per-cycle map tiles: wind and wave fields quantized to bytes and packed into PNGs.
+
+Each forecast hour of a published cycle becomes one RGBA PNG covering the
+cycle's bbox (north-up rows, west-to-east columns): R = u10, G = v10,
+B = swh. Byte 0 marks missing data and bytes 1..255 decode as
+``offset + (byte - 1) * scale`` with the per-channel values in
+``meta.json``. Tiles live under the store version they were cut from, so a
+URL never changes content and can be cached forever.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import shutil
+import struct
+import uuid
+import zlib
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+import xarray as xr
+
+logger = logging.getLogger(__name__)
+
+META = "meta.json"
+LATEST = "latest.json"
+
+# (channel, variable, offset, scale, units); ranges cover what a marine map needs and clip beyond
+CHANNELS = [
+    ("r", "u10", -40.0, 80.0 / 254, "m/s"),
+    ("g", "v10", -40.0, 80.0 / 254, "m/s"),
+    ("b", "swh", 0.0, 0.05, "m"),
+]
+
+
+def quantize(values: np.ndarray, offset: float, scale: float) -> np.ndarray:
+    """Map floats onto bytes 1..255, with NaN as 0."""
+    values = np.asarray(values, dtype=np.float32)
+    steps = np.clip(np.rint((values - offset) / scale), 0, 254)
+    return np.where(np.isnan(values), 0, steps + 1).astype(np.uint8)
+
+
+def encode_png(rgba: np.ndarray) -> bytes:
+    """Minimal 8-bit RGBA PNG encoder (no filtering), so tiles need no imaging dependency."""
+    height, width, _ = rgba.shape
+    rows = np.hstack([np.zeros((height, 1), dtype=np.uint8), rgba.reshape(height, width * 4)])
+
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", header)
+        + chunk(b"IDAT", zlib.compress(rows.tobytes(), 9))
+        + chunk(b"IEND", b"")
+    )
+
+
+class TileStore:
+    """``<root>/<model>/<version>/{fhour:03d}.png`` plus ``meta.json``, and ``<model>/latest.json``."""
+
+    def __init__(self, root: str, keep: int = 2):
+        self.root = Path(root)
+        self.keep = keep
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def has(self, model: str, version: str) -> bool:
+        return (self.root / model / version / META).exists()
+
+    def latest(self, model: str) -> Optional[dict]:
+        try:
+            return json.loads((self.root / model / LATEST).read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def write(self, ds: xr.Dataset) -> Path:
+        """Cut tiles for every forecast hour of a store-mapped cycle and mark it latest."""
+        model, version = ds.attrs["model"], ds.attrs["version"]
+        lat_name = "latitude" if "latitude" in ds.coords else "lat"
+        lon_name = "longitude" if "longitude" in ds.coords else "lon"
+        lats = np.asarray(ds[lat_name].values, dtype=float)
+        lons = np.asarray(ds[lon_name].values, dtype=float)
+        lat_order = np.argsort(lats)[::-1]  # north-up
+        lon_order = np.argsort(np.where(lons > 180, lons - 360, lons))
+        west_east = np.where(lons > 180, lons - 360, lons)[lon_order]
+
+        model_dir = self.root / model
+        tmp = model_dir / f".{version}-{uuid.uuid4().hex[:8]}"
+        tmp.mkdir(parents=True)
+        # Alpha stays opaque: browsers premultiply alpha when drawing to a canvas, which would corrupt RGB
+        rgba = np.full((len(lats), len(lons), 4), 255, dtype=np.uint8)
+        fhours = [int(h) for h in ds["fhour"].values]
+        sizes: Dict[int, int] = {}
+        for i, fhour in enumerate(fhours):
+            for c, (_, var, offset, scale, _) in enumerate(CHANNELS):
+                if var in ds:
+                    field = np.asarray(ds[var].isel(fhour=i).transpose(lat_name, lon_name).values)
+                    rgba[..., c] = quantize(field[np.ix_(lat_order, lon_order)], offset, scale)
+                else:
+                    rgba[..., c] = 0
+            data = encode_png(rgba)
+            (tmp / f"{fhour:03d}.png").write_bytes(data)
+            sizes[fhour] = len(data)
+
+        meta = {
+            "model": model,
+            "cycle": ds.attrs.get("cycle"),
+            "version": version,
+            "bbox": [float(west_east[0]), float(west_east[-1]), float(lats.min()), float(lats.max())],
+            "width": len(lons),
+            "height": len(lats),
+            "fhours": fhours,
+            "channels": {
+                channel: {"variable": var, "offset": offset, "scale": scale, "units": units, "present": var in ds}
+                for channel, var, offset, scale, units in CHANNELS
+            },
+            "bytes": sizes,
+        }
+        if "valid_time" in ds.coords and ds["valid_time"].dims == ("fhour",):
+            meta["valid_times"] = np.datetime_as_string(ds["valid_time"].values.astype("datetime64[s]"), unit="s").tolist()
+        (tmp / META).write_text(json.dumps(meta))
+
+        target = model_dir / version
+        shutil.rmtree(target, ignore_errors=True)
+        os.replace(tmp, target)
+        latest_tmp = model_dir / f".{LATEST}-{uuid.uuid4().hex[:8]}"
+        latest_tmp.write_text(json.dumps(meta))
+        os.replace(latest_tmp, model_dir / LATEST)
+        self._prune(model_dir)
+        logger.info("Wrote %d tiles for %s %s (%d bytes)", len(fhours), model, version, sum(sizes.values()))
+        return target
+
+    def _prune(self, model_dir: Path) -> None:
+        versions = sorted(
+            (p for p in model_dir.iterdir() if p.is_dir() and not p.name.startswith(".")),
+            key=lambda p: p.stat().st_mtime,
+            reverse=True,
+        )
+        for old in versions[self.keep:]:
+            shutil.rmtree(old, ignore_errors=True)
+
+
+__all__ = ["CHANNELS", "TileStore", "encode_png", "quantize"]
@@ -1,8 +1,19 @@
-"""Route definitions and helpers."""
+"""Route definitions, the persistent route registry and its spatial index."""
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Dict, List
+import fcntl
+import json
+import math
+import os
+import re
+import threading
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+BBox = Tuple[float, float, float, float]  # west, east, south, north
+ROUTE_ID = re.compile(r"[\w-]+")
 
 
 @dataclass
@@ -18,6 +29,45 @@ class Route:
     name: str
     waypoints: List[Waypoint]
     description: str = ""
+    active: bool = True
+
+    def bbox(self, pad: float = 0.0, snap: float = 0.25) -> BBox:
+        """Waypoint extent padded by ``pad`` degrees and snapped outward to ``snap``."""
+        lats = [wp.lat for wp in self.waypoints]
+        lons = [wp.lon for wp in self.waypoints]
+        return (
+            math.floor((min(lons) - pad) / snap) * snap,
+            math.ceil((max(lons) + pad) / snap) * snap,
+            math.floor((min(lats) - pad) / snap) * snap,
+            math.ceil((max(lats) + pad) / snap) * snap,
+        )
+
+
+def route_to_dict(route: Route) -> dict:
+    return asdict(route)
+
+
+def route_from_dict(data: dict) -> Route:
+    try:
+        waypoints = [Waypoint(str(w.get("name", "")), float(w["lat"]), float(w["lon"])) for w in data["waypoints"]]
+        route = Route(
+            id=str(data["id"]),
+            name=str(data.get("name") or data["id"]),
+            waypoints=waypoints,
+            description=str(data.get("description", "")),
+            active=bool(data.get("active", True)),
+        )
+    except (AttributeError, KeyError, TypeError, ValueError) as exc:
+        raise ValueError(f"Invalid route definition: {exc}") from exc
+    if not ROUTE_ID.fullmatch(route.id):
+        # ids become directory names under the forecast dir
+        raise ValueError("Route id may only contain letters, digits, '_' and '-'")
+    if len(route.waypoints) < 2:
+        raise ValueError("A route needs at least two waypoints")
+    for wp in route.waypoints:
+        if not (-90 <= wp.lat <= 90 and -180 <= wp.lon <= 180):
+            raise ValueError(f"Waypoint {wp.name!r} out of range")
+    return route
 
 
 DEFAULT_ROUTES: Dict[str, Route] = {
@@ -35,14 +85,141 @@ DEFAULT_ROUTES: Dict[str, Route] = {
 }
 
 
-def get_route(route_id: str) -> Route:
-    if route_id in DEFAULT_ROUTES:
-        return DEFAULT_ROUTES[route_id]
-    raise KeyError(f"Route {route_id} not found")
+class RouteRegistry:
+    """Routes persisted as JSON, with a coarse grid index over their bounding boxes.
+
+    The file is seeded from ``DEFAULT_ROUTES`` and reloaded whenever another
+    process rewrites it, so API workers and the scheduler agree on the set
+    of routes.
+    """
+
+    def __init__(self, path: str, pad: float = 1.0, cell: float = 1.0):
+        self.path = Path(path)
+        self.pad = pad
+        self.cell = cell
+        self._routes: Dict[str, Route] = {}
+        self._index: Dict[Tuple[int, int], Set[str]] = {}
+        self._mtime: Optional[int] = None
+        self._lock = threading.Lock()
+        with self._write_lock():
+            if not self.path.exists():
+                self._save(dict(DEFAULT_ROUTES))
+            self._reload()
+
+    @contextmanager
+    def _write_lock(self) -> Iterator[None]:
+        """Thread and cross-process lock around a read-modify-write of the routes file."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock, open(self.path.with_name(self.path.name + ".lock"), "w") as fh:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+    def _reload(self) -> None:
+        mtime = self.path.stat().st_mtime_ns
+        if mtime == self._mtime:
+            return
+        raw = json.loads(self.path.read_text())
+        self._routes = {r["id"]: route_from_dict(r) for r in raw}
+        self._mtime = mtime
+        self._rebuild_index()
+
+    def _save(self, routes: Dict[str, Route]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps([route_to_dict(r) for r in routes.values()], indent=2))
+        os.replace(tmp, self.path)
+
+    def _cells(self, bbox: BBox) -> Iterable[Tuple[int, int]]:
+        west, east, south, north = bbox
+        for i in range(math.floor(west / self.cell), math.floor(east / self.cell) + 1):
+            for j in range(math.floor(south / self.cell), math.floor(north / self.cell) + 1):
+                yield i, j
+
+    def _rebuild_index(self) -> None:
+        index: Dict[Tuple[int, int], Set[str]] = {}
+        for route in self._routes.values():
+            for key in self._cells(route.bbox(self.pad)):
+                index.setdefault(key, set()).add(route.id)
+        self._index = index
+
+    def get(self, route_id: str) -> Route:
+        with self._lock:
+            self._reload()
+            if route_id in self._routes:
+                return self._routes[route_id]
+        raise KeyError(f"Route {route_id} not found")
+
+    def list(self) -> List[Route]:
+        with self._lock:
+            self._reload()
+            return list(self._routes.values())
+
+    def create(self, route: Route) -> Route:
+        """Add a new route; raises ``ValueError`` if the id is taken."""
+        return self._write(route, overwrite=False)
+
+    def upsert(self, route: Route) -> Route:
+        return self._write(route, overwrite=True)
+
+    def _write(self, route: Route, overwrite: bool) -> Route:
+        with self._write_lock():
+            self._reload()
+            if not overwrite and route.id in self._routes:
+                raise ValueError(f"Route {route.id} already exists")
+            routes = dict(self._routes)
+            routes[route.id] = route
+            self._save(routes)
+            self._reload()
+        return route
+
+    def delete(self, route_id: str) -> None:
+        with self._write_lock():
+            self._reload()
+            if route_id not in self._routes:
+                raise KeyError(f"Route {route_id} not found")
+            routes = {k: v for k, v in self._routes.items() if k != route_id}
+            self._save(routes)
+            self._reload()
 
+    def query(self, bbox: BBox) -> List[Route]:
+        """Routes whose padded bounding box intersects ``bbox``."""
+        west, east, south, north = bbox
+        with self._lock:
+            self._reload()
+            candidates = set().union(*(self._index.get(key, set()) for key in self._cells(bbox)))
+            hits = []
+            for route_id in sorted(candidates):
+                route = self._routes[route_id]
+                w, e, s, n = route.bbox(self.pad)
+                if w <= east and e >= west and s <= north and n >= south:
+                    hits.append(route)
+            return hits
 
-def list_routes() -> List[Route]:
-    return list(DEFAULT_ROUTES.values())
+    def union_bbox(self, include: Iterable[str] = ()) -> Optional[BBox]:
+        """Smallest box covering every active route (plus ``include``), or None if there are none."""
+        wanted = set(include)
+        with self._lock:
+            self._reload()
+            boxes = [r.bbox(self.pad) for r in self._routes.values() if r.active or r.id in wanted]
+        if not boxes:
+            return None
+        return (
+            min(b[0] for b in boxes),
+            max(b[1] for b in boxes),
+            min(b[2] for b in boxes),
+            max(b[3] for b in boxes),
+        )
 
 
-__all__ = ["Waypoint", "Route", "DEFAULT_ROUTES", "get_route", "list_routes"]
+__all__ = [
+    "BBox",
+    "Waypoint",
+    "Route",
+    "RouteRegistry",
+    "DEFAULT_ROUTES",
+    "route_from_dict",
+    "route_to_dict",
+]
@@ -0,0 +1,233 @@
+"""Memory-mapped store of decoded model cycles shared across processes.
+
+Each published cycle is a directory holding one float32 ``.npy`` file per
+variable plus ``header.json`` with dimensions, coordinates and metadata.
+``<model>/current`` is a symlink swapped atomically on publish; readers map
+the arrays read-only, so every worker shares the same page cache instead of
+holding its own decoded copy.
+"""
+from __future__ import annotations
+
+import fcntl
+import json
+import logging
+import os
+import shutil
+import threading
+import uuid
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import xarray as xr
+
+from wx_engine.metrics import record_cache
+
+logger = logging.getLogger(__name__)
+
+HEADER = "header.json"
+CURRENT = "current"
+DEFAULT_TILE_BYTES = 64 * 1024 * 1024
+
+
+def _encode_coord(values: np.ndarray) -> Tuple[str, list]:
+    if values.dtype.kind == "M":
+        return "datetime64[s]", values.astype("datetime64[s]").astype(str).tolist()
+    if values.dtype.kind == "m":
+        return "timedelta64[s]", values.astype("timedelta64[s]").astype(np.int64).tolist()
+    return values.dtype.str, values.tolist()
+
+
+def _decode_coord(dtype: str, values: list) -> np.ndarray:
+    if dtype.startswith("timedelta64"):
+        return np.asarray(values, dtype=np.int64).astype(dtype)
+    return np.asarray(values, dtype=dtype)
+
+
+def bbox_contains(outer: Sequence[float], inner: Sequence[float]) -> bool:
+    """Whether ``(west, east, south, north)`` box ``outer`` contains ``inner``."""
+    if len(outer) != 4 or len(inner) != 4:
+        return False
+    west, east, south, north = (float(b) for b in outer)
+    w, e, s, n = (float(b) for b in inner)
+    return west <= w and east >= e and south <= s and north >= n
+
+
+class FieldStore:
+    def __init__(self, root: str, keep: int = 2):
+        self.root = Path(root)
+        self.keep = keep
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._mapped: Dict[str, Tuple[str, xr.Dataset]] = {}
+        self._lock = threading.Lock()
+
+    def header(self, model: str) -> Optional[dict]:
+        current = self.root / model / CURRENT
+        try:
+            return json.loads((current / HEADER).read_text())
+        except (FileNotFoundError, NotADirectoryError, json.JSONDecodeError):
+            return None
+
+    def covers(self, model: str, cycle: str, bbox: Sequence[float], hours: Iterable[int]) -> bool:
+        """Whether the current cycle for ``model`` is ``cycle`` and holds ``hours`` over a box containing ``bbox``."""
+        header = self.header(model)
+        return (
+            header is not None
+            and header.get("cycle") == cycle
+            and bbox_contains(header.get("bbox", []), bbox)
+            and set(hours) <= set(header.get("fhours", []))
+        )
+
+    def has(self, model: str, cycle: str, bbox: Sequence[float], hours: Iterable[int]) -> bool:
+        """``covers``, counted as a field-store cache hit or miss."""
+        hit = self.covers(model, cycle, bbox, hours)
+        record_cache("field_store", hit=hit)
+        return hit
+
+    @contextmanager
+    def lock(self, model: str) -> Iterator[None]:
+        """Cross-process lock so only one worker decodes and publishes a model at a time."""
+        model_dir = self.root / model
+        model_dir.mkdir(parents=True, exist_ok=True)
+        with open(model_dir / ".lock", "w") as fh:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+    def publish(
+        self, model: str, cycle: str, ds: xr.Dataset, bbox: Sequence[float], max_bytes: int = DEFAULT_TILE_BYTES
+    ) -> Path:
+        """Write an in-memory ``(fhour, lat, lon)`` dataset as a new version of ``model``."""
+        hours = [(int(h), ds.isel(fhour=i)) for i, h in enumerate(ds["fhour"].values)]
+        return self.publish_hours(model, cycle, hours, bbox, max_bytes)
+
+    def publish_hours(
+        self,
+        model: str,
+        cycle: str,
+        hours: Sequence[Tuple[int, xr.Dataset]],
+        bbox: Sequence[float],
+        max_bytes: int = DEFAULT_TILE_BYTES,
+    ) -> Path:
+        """Stream per-hour (possibly lazy) 2-D datasets into a new version and make it current.
+
+        Each variable is written hour by hour in row tiles of at most
+        ``max_bytes`` with plain file writes, so peak memory is one tile no
+        matter how many hours or how wide the bbox is.
+        """
+        if not hours:
+            raise ValueError("No forecast hours to publish")
+        first = hours[0][1]
+        lat_name = "latitude" if "latitude" in first.coords else "lat"
+        lon_name = "longitude" if "longitude" in first.coords else "lon"
+        grid = (lat_name, lon_name)
+        variables: List[str] = []
+        for _, hour_ds in hours:
+            for name, var in hour_ds.data_vars.items():
+                if name in variables:
+                    continue
+                if set(var.dims) != set(grid):
+                    logger.warning("Skipping %s with dims %s; store holds 2-D fields per hour", name, var.dims)
+                    continue
+                variables.append(name)
+        nlat, nlon = first.sizes[lat_name], first.sizes[lon_name]
+        shape = (len(hours), nlat, nlon)
+        rows = max(1, min(nlat, max_bytes // (nlon * 4)))
+
+        model_dir = self.root / model
+        version = model_dir / f"{cycle}-{uuid.uuid4().hex[:8]}"
+        version.mkdir(parents=True)
+        header = {
+            "model": model,
+            "cycle": cycle,
+            "bbox": list(bbox),
+            "fhours": [int(h) for h, _ in hours],
+            "coords": {"fhour": {"dims": ["fhour"], "dtype": "<i8", "values": [int(h) for h, _ in hours]}},
+            "variables": {name: {"dims": ["fhour", lat_name, lon_name], "shape": list(shape)} for name in variables},
+        }
+        for name in grid:
+            dtype, values = _encode_coord(np.asarray(first[name].values))
+            header["coords"][name] = {"dims": [name], "dtype": dtype, "values": values}
+        for name, coord in first.coords.items():
+            # Per-hour scalars such as valid_time/step become coordinates along fhour
+            if coord.ndim == 0 and name != "fhour":
+                stacked = np.stack([np.asarray(h.coords[name].values) for _, h in hours if name in h.coords])
+                if len(stacked) == len(hours):
+                    dtype, values = _encode_coord(stacked)
+                    header["coords"][name] = {"dims": ["fhour"], "dtype": dtype, "values": values}
+
+        with ExitStack() as stack:
+            files = {}
+            for name in variables:
+                fh = stack.enter_context(open(version / f"{name}.npy", "wb"))
+                np.lib.format.write_array_header_1_0(
+                    fh, {"descr": np.dtype(np.float32).str, "fortran_order": False, "shape": shape}
+                )
+                files[name] = fh
+            for _, hour_ds in hours:
+                for name, fh in files.items():
+                    var = hour_ds[name].transpose(*grid) if name in hour_ds else None
+                    for r0 in range(0, nlat, rows):
+                        r1 = min(nlat, r0 + rows)
+                        if var is None:
+                            tile = np.full((r1 - r0, nlon), np.nan, dtype=np.float32)
+                        else:
+                            tile = np.asarray(var.isel({lat_name: slice(r0, r1)}).values, dtype=np.float32)
+                        fh.write(tile.tobytes())
+        header["nbytes"] = int(np.prod(shape)) * 4 * len(variables)
+        (version / HEADER).write_text(json.dumps(header))
+        self._swap(model_dir, version)
+        logger.info("Published %s cycle %s (%d hours) to %s", model, cycle, len(hours), version)
+        return version
+
+    def _swap(self, model_dir: Path, version: Path) -> None:
+        tmp = model_dir / f".{CURRENT}-{uuid.uuid4().hex[:8]}"
+        os.symlink(version.name, tmp)
+        os.replace(tmp, model_dir / CURRENT)
+        versions = sorted(
+            (p for p in model_dir.iterdir() if p.is_dir() and not p.is_symlink()),
+            key=lambda p: p.stat().st_mtime,
+            reverse=True,
+        )
+        # Open mappings keep removed files alive until their readers remap.
+        for old in versions[self.keep:]:
+            shutil.rmtree(old, ignore_errors=True)
+
+    def open(self, model: str) -> Optional[xr.Dataset]:
+        """Map the current cycle of ``model`` read-only, reusing the mapping until a swap."""
+        current = self.root / model / CURRENT
+        try:
+            version = os.readlink(current)
+        except (FileNotFoundError, OSError):
+            return None
+        return self.open_version(model, version)
+
+    def open_version(self, model: str, version: str) -> xr.Dataset:
+        """Map one published version of ``model``, e.g. to pin a cycle across processes."""
+        with self._lock:
+            cached = self._mapped.get(model)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+            ds = self._map(self.root / model / version)
+            self._mapped[model] = (version, ds)
+            return ds
+
+    def _map(self, path: Path) -> xr.Dataset:
+        header = json.loads((path / HEADER).read_text())
+        coords = {
+            name: (spec["dims"], _decode_coord(spec["dtype"], spec["values"]))
+            for name, spec in header["coords"].items()
+        }
+        data_vars = {
+            name: (spec["dims"], np.load(path / f"{name}.npy", mmap_mode="r"))
+            for name, spec in header["variables"].items()
+        }
+        return xr.Dataset(
+            data_vars, coords=coords, attrs={"cycle": header["cycle"], "model": header["model"], "version": path.name}
+        )
+
+
+__all__ = ["FieldStore", "bbox_contains"]
@@ -0,0 +1,109 @@
+"""Per-run trace spans and optional profiling for forecast runs."""
+from __future__ import annotations
+
+import cProfile
+import io
+import pstats
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from wx_engine.metrics import STAGE_SECONDS
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("wx_current_span", default=None)
+
+
+@dataclass
+class Span:
+    name: str
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    start: float = 0.0
+    duration: float = 0.0
+    children: List["Span"] = field(default_factory=list)
+
+    @property
+    def model(self) -> str:
+        return str(self.attributes.get("model", ""))
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "start": datetime.fromtimestamp(self.start, tz=timezone.utc).isoformat(),
+            "duration_ms": round(self.duration * 1000, 3),
+            "attributes": self.attributes,
+            "children": [c.to_dict() for c in self.children],
+        }
+
+
+@dataclass
+class Trace:
+    run_id: str
+    root: Span
+    profile: Optional[cProfile.Profile] = None
+
+    def to_dict(self) -> dict:
+        return {"run_id": self.run_id, **self.root.to_dict()}
+
+    def save_profile(self, path: Path, top: int = 40) -> Optional[Path]:
+        """Dump cProfile stats (open with snakeviz/flameprof) plus a text summary."""
+        if self.profile is None:
+            return None
+        self.profile.dump_stats(str(path))
+        buf = io.StringIO()
+        pstats.Stats(self.profile, stream=buf).sort_stats("cumulative").print_stats(top)
+        path.with_suffix(".txt").write_text(buf.getvalue())
+        return path
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Span]:
+    """Open a child span of the active one and record its duration as a stage metric.
+
+    ``model`` is inherited from the parent span when not given so stage
+    metrics stay labelled per model.
+    """
+    parent = _current_span.get()
+    if "model" not in attributes and parent is not None and parent.model:
+        attributes["model"] = parent.model
+    current = Span(name=name, attributes=attributes, start=time.time())
+    if parent is not None:
+        parent.children.append(current)
+    token = _current_span.set(current)
+    started = time.perf_counter()
+    try:
+        yield current
+    finally:
+        current.duration = time.perf_counter() - started
+        _current_span.reset(token)
+        STAGE_SECONDS.observe(current.duration, stage=name, model=current.model)
+
+
+@contextmanager
+def trace(name: str, profile: bool = False, **attributes: Any) -> Iterator[Trace]:
+    """Start a new trace rooted at ``name``, optionally under cProfile."""
+    run_id = datetime.now(tz=timezone.utc).strftime("%Y%m%d%H%M%S") + "-" + uuid.uuid4().hex[:8]
+    profiler = cProfile.Profile() if profile else None
+    token = _current_span.set(None)
+    try:
+        with span(name, run_id=run_id, **attributes) as root:
+            result = Trace(run_id=run_id, root=root, profile=profiler)
+            if profiler is not None:
+                profiler.enable()
+            try:
+                yield result
+            finally:
+                if profiler is not None:
+                    profiler.disable()
+    finally:
+        _current_span.reset(token)
+
+
+__all__ = ["Span", "Trace", "span", "trace"]